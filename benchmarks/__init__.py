@@ -0,0 +1 @@
+"""Бенчмарки: запуск - python -m benchmarks.<модуль> из корня репозитория"""
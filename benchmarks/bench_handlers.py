@@ -0,0 +1,198 @@
+"""
+Бенчмарк хендлеров: синтетические Update проходят через настоящий
+Dispatcher, middleware и handlers.router. database подменен на
+benchmarks.fake_database, сессия Bot - на FakeSession, FSM - MemoryStorage.
+
+    python -m benchmarks.bench_handlers            # прогон и сравнение с baseline
+    python -m benchmarks.bench_handlers --save     # записать новый baseline
+
+Код возврата 1, если p50 или p99 какого-то сценария хуже baseline
+больше чем на --tolerance.
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import platform
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.harness import (
+    BASELINES_DIR, install_fake_database, percentile, load_baseline, save_baseline, change
+)
+fake_database = install_fake_database()
+
+import aiogram
+from aiogram import Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Update
+from airports_data import AIRPORTS
+from compliance import compliance_counters
+from config import ADMIN_ID
+from handlers import router
+from message_cleanup import message_cleaner
+from middlewares import setup_middlewares
+from utils import local_today
+from benchmarks.fake_bot import make_bot
+from benchmarks.synthetic import make_users
+
+BASELINE_PATH = os.path.join(BASELINES_DIR, "handlers.json")
+
+# Новые пользователи сценария регистрации не пересекаются с синтетическими
+NEW_USER_ID = 5_000_000
+
+class UpdateFactory:
+    """Синтетические Update в том виде, в каком их отдает Telegram"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.update_id = 0
+        self.message_id = 0
+
+    def message(self, user_id, text):
+        self.update_id += 1
+        self.message_id += 1
+        message = {
+            'message_id': self.message_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Бенчмарк', 'username': f"user{user_id}"},
+            'text': text,
+        }
+        if text.startswith('/'):
+            command = text.split()[0]
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(command)}]
+        return Update.model_validate({'update_id': self.update_id, 'message': message}, context={'bot': self.bot})
+
+def registration_answers(today):
+    """Ответы на все шаги анкеты, как их вводит пользователь"""
+    day = lambda days: (today + timedelta(days=days)).strftime("%d.%m.%Y")
+    return [
+        "Иванов Иван Иванович", "капитан", "военный летчик 1 класса",
+        f"{day(-60)} - {day(-30)}", day(200), day(150),
+        day(90), day(120), day(25), day(300), "освобожден",
+    ]
+
+def build_scenarios(factory, users, today):
+    """Имя сценария -> функция (номер итерации) -> список Update"""
+    user_ids = [user['user_id'] for user in users]
+    keywords = [keyword.split()[0][:5].lower() for keyword, _ in AIRPORTS]
+    answers = registration_answers(today)
+
+    def pick(i):
+        return user_ids[i % len(user_ids)]
+
+    return {
+        'start': lambda i: [factory.message(pick(i), "/start")],
+        'registration': lambda i: [factory.message(NEW_USER_ID + i, "/start")]
+                                  + [factory.message(NEW_USER_ID + i, text) for text in answers],
+        'profile': lambda i: [factory.message(pick(i), "👤 Мой профиль")],
+        'search': lambda i: [factory.message(pick(i), "📚 Полезная информация"),
+                             factory.message(pick(i), keywords[i % len(keywords)])],
+        'list': lambda i: [factory.message(ADMIN_ID, "/list")],
+    }
+
+async def run_scenario(dp, bot, build, iterations, warmup):
+    """Прогнать сценарий, вернуть updates/sec и задержки одного обновления"""
+    latencies = []
+    for i in range(warmup + iterations):
+        for update in build(i):
+            started = time.perf_counter()
+            await dp.feed_update(bot, update)
+            elapsed = time.perf_counter() - started
+            if i >= warmup:
+                latencies.append(elapsed)
+    # Фоновые удаления сообщений не должны перетекать в следующий сценарий
+    await message_cleaner.flush()
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'updates': len(latencies),
+        'updates_per_sec': round(len(latencies) / total, 1) if total else 0.0,
+        'mean_ms': round(total / len(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+async def run(iterations, warmup, user_count, only=None):
+    today = local_today()
+    users = make_users(user_count, today)
+    fake_database.reset(users=users, info=AIRPORTS)
+    compliance_counters.rebuild(users, today)
+
+    bot = make_bot()
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.include_router(router)
+    setup_middlewares(dp, bot)
+
+    scenarios = build_scenarios(UpdateFactory(bot), users, today)
+    results = {}
+    for name, build in scenarios.items():
+        if only and name not in only:
+            continue
+        results[name] = await run_scenario(dp, bot, build, iterations, warmup)
+    await message_cleaner.close()
+    await bot.session.close()
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'aiogram': aiogram.__version__,
+            'platform': platform.platform(),
+            'iterations': iterations,
+            'users': user_count,
+            'api_calls': dict(bot.session.calls),
+        },
+        'scenarios': results,
+    }
+
+def compare(report, baseline, tolerance):
+    """Таблица сравнения с baseline, вернуть список регрессий"""
+    regressions = []
+    print(f"{'сценарий':<14}{'upd/s':>10}{'p50, мс':>10}{'p99, мс':>10}   изменение p50 / p99")
+    for name, result in report['scenarios'].items():
+        line = f"{name:<14}{result['updates_per_sec']:>10}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+        old = baseline.get('scenarios', {}).get(name) if baseline else None
+        if old:
+            deltas = []
+            for key in ('p50_ms', 'p99_ms'):
+                delta = change(result[key], old[key])
+                deltas.append(f"{delta:+.0%}")
+                if delta > tolerance:
+                    regressions.append(f"{name} {key}: {old[key]} -> {result[key]}")
+            line += "   " + " / ".join(deltas)
+        print(line)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк хендлеров бота")
+    parser.add_argument("--iterations", type=int, default=300, help="итераций на сценарий")
+    parser.add_argument("--warmup", type=int, default=30, help="итераций прогрева (не учитываются)")
+    parser.add_argument("--users", type=int, default=500, help="синтетических пользователей в базе")
+    parser.add_argument("--scenario", action="append", help="запустить только этот сценарий (можно несколько)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="файл baseline (JSON)")
+    parser.add_argument("--save", action="store_true", help="записать результат как новый baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустимое ухудшение p50/p99 (доля)")
+    args = parser.parse_args()
+
+    # Лог медленных обновлений и логи хендлеров не нужны в выводе
+    logging.basicConfig(level=logging.ERROR)
+    report = asyncio.run(run(args.iterations, args.warmup, args.users, args.scenario))
+
+    regressions = compare(report, load_baseline(args.baseline), args.tolerance)
+
+    if args.save:
+        save_baseline(args.baseline, report)
+        return 0
+    if regressions:
+        print("❌ Регрессии:\n" + "\n".join(f"  {item}" for item in regressions))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Масштабный бенчмарк: расчет статусов, ежедневная проверка сроков,
+статистика и список личного состава на 1k / 10k / 100k синтетических
+пользователей. Для каждого этапа - время (медиана повторов) и пиковая
+память (tracemalloc, отдельным проходом, чтобы не искажать время).
+
+    python -m benchmarks.bench_scale                       # 1k, 10k, 100k
+    python -m benchmarks.bench_scale --sizes 1000 10000    # выборочно
+    python -m benchmarks.bench_scale --save                # записать baseline
+
+database подменен на benchmarks.fake_database, SQL здесь не измеряется:
+этапов на выборку сроков и страниц списка нет - их стоимость в памяти
+ничего не говорит о запросах в Postgres (для них - /db_stats и EXPLAIN
+на настоящей базе). check_deadlines получает заранее выбранные строки
+и меряет только код бота после запроса: группировку, тексты, рассылку.
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import statistics
+import tracemalloc
+from datetime import datetime, timedelta
+from functools import partial
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.harness import (
+    BASELINES_DIR, install_fake_database, load_baseline, save_baseline, change
+)
+fake_database = install_fake_database()
+
+import scheduler
+from compliance import compliance_counters
+from config import ROSTER_PAGE_SIZE
+from notifications import NotificationDispatcher
+from qualifications import evaluate_users
+from utils import generate_profile_text, get_user_status_with_colors, local_today
+from handlers.admin.list import format_roster
+from handlers.admin.stats import format_stats
+from benchmarks.fake_bot import make_bot
+from benchmarks.synthetic import make_users
+
+BASELINE_PATH = os.path.join(BASELINES_DIR, "scale.json")
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+def build_stages(users, today, bot):
+    """Имя этапа -> функция без аргументов (обычная или async)"""
+
+    def profiles():
+        for status in evaluate_users(users, today):
+            generate_profile_text(status.user, status)
+
+    def status_colors():
+        for user in users:
+            get_user_status_with_colors(user)
+
+    def roster_full():
+        # Весь список постранично - сколько стоило бы показать всех разом
+        for start in range(0, len(users), ROSTER_PAGE_SIZE):
+            format_roster(users[start:start + ROSTER_PAGE_SIZE])
+
+    def stats():
+        format_stats(compliance_counters.snapshot(today))
+
+    days = iter(range(1, 1_000_000))
+
+    def rollover():
+        # Каждый вызов - смена суток: пересчитываются только сменившие статус
+        compliance_counters.rollover(today + timedelta(days=next(days)))
+
+    return {
+        'evaluate': lambda: evaluate_users(users, today),
+        'profile_text': profiles,
+        'status_with_colors': status_colors,
+        'check_deadlines': partial(scheduler.check_deadlines, bot),
+        'stats_rebuild': lambda: compliance_counters.rebuild(users, today),
+        'stats_snapshot': stats,
+        'roster_full': roster_full,
+        # Сдвигает дату счетчиков - идет последним
+        'stats_rollover': rollover,
+    }
+
+async def _due_rows(rows, today, days_before):
+    return [dict(row) for row in rows]
+
+async def call(stage):
+    result = stage()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+async def measure(stage, repeat):
+    """Медиана времени (мс) и пиковая память сверх текущей (КБ)"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call(stage)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    await call(stage)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings) * 1000, (peak - before) / 1024
+
+async def run_size(size, repeat, only=None):
+    today = local_today()
+    tracemalloc.start()
+    users = make_users(size, today)
+    dataset_kb = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+
+    fake_database.reset(users=users)
+    compliance_counters.rebuild(users, today)
+    bot = make_bot()
+    # Лимит Telegram здесь не измеряем: рассылка идет без ожидания токенов
+    scheduler.NotificationDispatcher = partial(NotificationDispatcher, rate=1e9, burst=1e9)
+    # Результат "запроса" готов заранее: выборка в памяти - не SQL
+    due = await fake_database.get_due_deadlines(today, scheduler.CHECK_DAYS)
+    scheduler.get_due_deadlines = partial(_due_rows, due)
+
+    stages = {}
+    for name, stage in build_stages(users, today, bot).items():
+        if only and name not in only:
+            continue
+        elapsed_ms, peak_kb = await measure(stage, repeat)
+        stages[name] = {
+            'ms': round(elapsed_ms, 2),
+            'per_user_us': round(elapsed_ms * 1000 / size, 3),
+            'peak_kb': round(peak_kb, 1),
+        }
+    await bot.session.close()
+    return {'dataset_kb': round(dataset_kb, 1), 'api_calls': dict(bot.session.calls), 'stages': stages}
+
+async def run(sizes, repeat, only=None):
+    results = {}
+    for size in sizes:
+        print(f"⏳ {size} пользователей...", flush=True)
+        results[str(size)] = await run_size(size, repeat, only)
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'sizes': results,
+    }
+
+def compare(report, baseline, tolerance):
+    """Таблица по этапам, вернуть список регрессий по времени"""
+    regressions = []
+    for size, result in report['sizes'].items():
+        print(f"\n👥 {size} пользователей (данные: {result['dataset_kb'] / 1024:.1f} МБ)")
+        print(f"{'этап':<20}{'мс':>12}{'мкс/польз.':>12}{'пик, КБ':>12}   изменение")
+        old_stages = (baseline or {}).get('sizes', {}).get(size, {}).get('stages', {})
+        for name, stage in result['stages'].items():
+            line = f"{name:<20}{stage['ms']:>12.2f}{stage['per_user_us']:>12.3f}{stage['peak_kb']:>12.1f}"
+            old = old_stages.get(name)
+            if old:
+                delta = change(stage['ms'], old['ms'])
+                line += f"   {delta:+.0%}"
+                if delta > tolerance:
+                    regressions.append(f"{size} {name}: {old['ms']} -> {stage['ms']} мс")
+            print(line)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Масштабный бенчмарк расчета сроков")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="размеры набора")
+    parser.add_argument("--repeat", type=int, default=3, help="повторов каждого этапа")
+    parser.add_argument("--stage", action="append", help="запустить только этот этап (можно несколько)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="файл baseline (JSON)")
+    parser.add_argument("--save", action="store_true", help="записать результат как новый baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустимое ухудшение времени (доля)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    report = asyncio.run(run(args.sizes, args.repeat, args.stage))
+    regressions = compare(report, load_baseline(args.baseline), args.tolerance)
+
+    if args.save:
+        save_baseline(args.baseline, report)
+        return 0
+    if regressions:
+        print("❌ Регрессии:\n" + "\n".join(f"  {item}" for item in regressions))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
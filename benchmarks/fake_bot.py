@@ -0,0 +1,52 @@
+"""Сессия Bot без сети: отвечает на методы Bot API правдоподобными объектами"""
+import asyncio
+from collections import Counter
+from datetime import datetime
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums import ParseMode
+from aiogram.types import Chat, Message
+
+# Токен нужного формата; запросы все равно никуда не уходят
+FAKE_TOKEN = "123456789:benchmark-token"
+
+class FakeSession(BaseSession):
+    """
+    Заменитель AiohttpSession. latency - искусственная задержка запроса
+    (секунды), calls - сколько раз вызывался каждый метод.
+    """
+
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls = Counter()
+        self._message_id = 0
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls[type(method).__name__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method.__returning__ is Message:
+            self._message_id += 1
+            chat_id = getattr(method, 'chat_id', 0)
+            message = Message(
+                message_id=self._message_id,
+                date=datetime.now(),
+                chat=Chat(id=chat_id if isinstance(chat_id, int) else 0, type='private'),
+                text=getattr(method, 'text', None),
+            )
+            return message.as_(bot)
+        # edit_message_text, answer_callback_query, delete_message(s) и т.п.
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+def make_bot(latency=0.0):
+    """Bot с FakeSession и теми же настройками по умолчанию, что в main.py"""
+    return Bot(token=FAKE_TOKEN, session=FakeSession(latency),
+               default=DefaultBotProperties(parse_mode=ParseMode.HTML))
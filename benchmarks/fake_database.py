@@ -0,0 +1,257 @@
+"""
+Заменитель database.py в памяти процесса для бенчмарков.
+
+Повторяет публичные функции database (имена, аргументы, форму результата),
+но хранит данные в словарях. Подключается до импорта хендлеров:
+
+    sys.modules['database'] = fake_database
+"""
+import copy
+from datetime import datetime, timedelta
+from config import ADMIN_ID, ROSTER_PAGE_SIZE, SEARCH_RESULTS_LIMIT, EXPORT_FETCH_SIZE
+from qualifications import evaluate_user, convert_field_value
+from compliance import compliance_counters
+from roles import admin_registry
+
+REGISTRATION_FIELDS = (
+    'fio', 'rank', 'qual_rank', 'vacation_start', 'vacation_end',
+    'vlk_date', 'umo_date', 'kbp_4_md_m', 'kbp_7_md_m',
+    'kbp_4_md_90a', 'kbp_7_md_90a', 'jumps_date'
+)
+USER_COLUMNS = ('user_id', 'username') + REGISTRATION_FIELDS + ('registered',)
+ROSTER_FILTERS = ('all', 'red', 'warn')
+
+_users = {}
+_info = {}
+_admins = {}
+_last_messages = {}
+
+def reset(users=(), info=(), admins=()):
+    """Заполнить хранилище заново"""
+    _users.clear()
+    _info.clear()
+    _admins.clear()
+    _last_messages.clear()
+    for user in users:
+        _users[user['user_id']] = dict(user)
+    for keyword, content in info:
+        _info[keyword] = content
+    for user_id in (ADMIN_ID, *admins):
+        _admins[user_id] = {'user_id': user_id, 'added_by': ADMIN_ID, 'added_at': datetime.now()}
+    admin_registry.replace(_admins)
+
+def _saved(user):
+    if user.get('registered'):
+        compliance_counters.upsert(user)
+    return dict(user)
+
+# ========== ПУЛ И СХЕМА ==========
+
+async def init_pool():
+    return None
+
+async def close_pool():
+    return None
+
+async def init_db():
+    return None
+
+def acquire():
+    raise RuntimeError("В бенчмарке нет подключения к БД")
+
+async def ping():
+    return 1
+
+def get_pool_stats():
+    return {'size': 0, 'in_use': 0, 'idle': 0, 'max_size': 0, 'waiters': 0,
+            'acquired_total': 0, 'acquire_avg_ms': 0.0, 'acquire_max_ms': 0.0}
+
+def get_query_stats(limit=10):
+    return {'top': [], 'plans': []}
+
+def get_user_cache_stats():
+    return {'size': len(_users), 'maxsize': 0, 'hits': 0, 'misses': 0, 'evictions': 0, 'hit_rate': 0.0}
+
+# ========== ПОЛЬЗОВАТЕЛИ ==========
+
+async def add_user(user_id, username):
+    user = _users.get(user_id)
+    if user is None:
+        user = _users[user_id] = {column: None for column in USER_COLUMNS}
+        user.update(user_id=user_id, registered=False)
+    user['username'] = username
+    return dict(user)
+
+async def update_user_field(user_id, field, value):
+    return await update_user_fields(user_id, **{field: value})
+
+async def update_user_fields(user_id, **values):
+    user = _users.get(user_id)
+    if user is None:
+        return None
+    user.update({field: convert_field_value(field, value) for field, value in values.items()})
+    return _saved(user)
+
+async def register_user(user_id, username, data):
+    values = {field: convert_field_value(field, data.get(field)) for field in REGISTRATION_FIELDS}
+    await add_user(user_id, username)
+    user = _users[user_id]
+    user.update(values, registered=True)
+    return _saved(user)
+
+async def set_registered(user_id):
+    user = _users.get(user_id)
+    if user is None:
+        return None
+    user['registered'] = True
+    return _saved(user)
+
+async def get_user(user_id):
+    user = _users.get(user_id)
+    return dict(user) if user is not None else None
+
+async def get_all_users():
+    return [dict(user) for user in _users.values() if user.get('registered')]
+
+async def iter_users(prefetch=EXPORT_FETCH_SIZE):
+    rows = sorted(
+        (user for user in _users.values() if user.get('registered')),
+        key=lambda user: (user.get('fio') or '', user['user_id'])
+    )
+    for user in rows:
+        yield dict(user)
+
+async def delete_user(user_id):
+    _users.pop(user_id, None)
+    compliance_counters.remove(user_id)
+
+async def get_due_deadlines(today, days_before):
+    targets = {today + timedelta(days=days): days for days in days_before}
+    due = []
+    for user in _users.values():
+        if not user.get('registered'):
+            continue
+        for status in evaluate_user(user, today).fields.values():
+            if status.value in targets:
+                due.append({'user_id': user['user_id'], 'fio': user.get('fio'),
+                            'field': status.qualification.column, 'days_left': status.days_left})
+    return due
+
+def _roster_match(user, roster_filter, today):
+    if roster_filter == 'all':
+        return True
+    status = evaluate_user(user, today)
+    if roster_filter == 'red':
+        return status.is_banned
+    return status.has_warnings
+
+async def get_users_page(today, roster_filter='all', direction='first', cursor=None, limit=ROSTER_PAGE_SIZE):
+    if roster_filter not in ROSTER_FILTERS:
+        roster_filter = 'all'
+    if direction not in ('next', 'prev') or cursor is None:
+        direction, cursor = 'first', None
+    rows = sorted(
+        (user for user in _users.values()
+         if user.get('registered') and _roster_match(user, roster_filter, today)),
+        key=lambda user: (user.get('fio') or '', user['user_id'])
+    )
+    ids = [user['user_id'] for user in rows]
+    position = ids.index(cursor) if cursor in ids else 0
+    if direction == 'next':
+        page, more = rows[position + 1:position + 1 + limit], len(rows) > position + 1 + limit
+        return {'users': copy.deepcopy(page), 'has_prev': True, 'has_next': more}
+    if direction == 'prev':
+        start = max(position - limit, 0)
+        return {'users': copy.deepcopy(rows[start:position]), 'has_prev': start > 0, 'has_next': True}
+    return {'users': copy.deepcopy(rows[:limit]), 'has_prev': False, 'has_next': len(rows) > limit}
+
+# ========== СПРАВОЧНИК ==========
+
+def normalize_keyword(text):
+    return (text or "").strip().lower().replace('ё', 'е')
+
+async def search_info(keyword, limit=SEARCH_RESULTS_LIMIT):
+    query = normalize_keyword(keyword)
+    if not query:
+        return []
+    ranked = []
+    for stored, content in _info.items():
+        key = normalize_keyword(stored)
+        if key == query:
+            ranked.append((0, key, content))
+        elif key.startswith(query):
+            ranked.append((1, key, content))
+        elif query in key:
+            ranked.append((2, key, content))
+    ranked.sort()
+    return [content for _, _, content in ranked[:limit]]
+
+async def add_info(keyword, content):
+    _info[keyword] = content
+
+async def bulk_upsert_info(entries):
+    result = {'total': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0}
+    for keyword, content in dict(entries).items():
+        result['total'] += 1
+        if keyword not in _info:
+            result['inserted'] += 1
+        elif _info[keyword] != content:
+            result['updated'] += 1
+        else:
+            result['unchanged'] += 1
+        _info[keyword] = content
+    return result
+
+async def delete_info(keyword):
+    _info.pop(keyword, None)
+
+async def get_all_info():
+    return [{'keyword': keyword, 'content': content} for keyword, content in _info.items()]
+
+# ========== ПОСЛЕДНИЕ СООБЩЕНИЯ ==========
+
+async def save_last_message(chat_id, message_id):
+    _last_messages[chat_id] = message_id
+
+async def load_last_messages(max_age, limit):
+    return list(_last_messages.items())[-limit:]
+
+# ========== АДМИНЫ ==========
+
+async def load_admins():
+    admin_registry.replace(_admins)
+
+async def is_admin(user_id):
+    return admin_registry.is_admin(user_id)
+
+async def is_super_admin(user_id):
+    return user_id == ADMIN_ID
+
+async def add_admin(target_user_id, added_by_user_id):
+    if target_user_id == added_by_user_id:
+        return False, "❌ Нельзя добавить самого себя"
+    if target_user_id in _admins:
+        return False, f"❌ Пользователь {target_user_id} уже является админом"
+    _admins[target_user_id] = {'user_id': target_user_id, 'added_by': added_by_user_id, 'added_at': datetime.now()}
+    admin_registry.add(target_user_id)
+    return True, f"✅ Пользователь {target_user_id} добавлен в администраторы"
+
+async def remove_admin(target_user_id, removed_by_user_id):
+    if target_user_id == ADMIN_ID:
+        return False, "🚫 Нельзя удалить главного администратора!"
+    if target_user_id == removed_by_user_id:
+        return False, "❌ Нельзя удалить самого себя. Попросите другого админа."
+    admin_registry.discard(target_user_id)
+    if _admins.pop(target_user_id, None) is None:
+        return False, f"❌ Пользователь {target_user_id} не является админом"
+    return True, f"✅ Пользователь {target_user_id} удален из администраторов"
+
+async def get_all_admins():
+    return sorted((dict(admin) for admin in _admins.values()), key=lambda admin: admin['added_at'])
+
+async def get_admin_info(user_id):
+    admin = _admins.get(user_id)
+    return dict(admin) if admin else None
+
+async def get_admin_count():
+    return len(_admins)
@@ -0,0 +1,42 @@
+"""Общее для бенчмарков: окружение, подмена database, перцентили, baseline"""
+import os
+import sys
+import json
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+def install_fake_database():
+    """
+    Подготовить окружение и подменить database на fake_database.
+    Вызывается до импорта хендлеров и планировщика.
+    """
+    # config требует эти переменные; в бенчмарке они ни к чему не подключаются
+    os.environ.setdefault("BOT_TOKEN", "123456789:benchmark-token")
+    os.environ.setdefault("DSN", "postgresql://benchmark@localhost/benchmark")
+    from benchmarks import fake_database
+    sys.modules['database'] = fake_database
+    return fake_database
+
+def percentile(sorted_values, pct):
+    """Перцентиль по ближайшему рангу"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(path, report):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"💾 Baseline сохранен: {path}")
+
+def change(new, old):
+    """Относительное изменение new к old (0.1 = на 10% больше)"""
+    return new / old - 1 if old else 0.0
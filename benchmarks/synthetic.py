@@ -0,0 +1,64 @@
+"""Синтетический личный состав с реалистичным разбросом сроков"""
+import random
+from datetime import timedelta
+from qualifications import QUALIFICATIONS
+
+SURNAMES = ("Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Волков",
+            "Соколов", "Лебедев", "Козлов", "Новиков", "Морозов", "Павлов", "Федоров")
+NAMES = ("Алексей", "Андрей", "Дмитрий", "Сергей", "Иван", "Михаил", "Николай", "Павел")
+PATRONYMICS = ("Алексеевич", "Андреевич", "Викторович", "Сергеевич", "Иванович", "Петрович")
+RANKS = ("лейтенант", "старший лейтенант", "капитан", "майор", "подполковник", "полковник")
+QUAL_RANKS = ("военный летчик", "военный летчик 3 класса", "военный летчик 2 класса",
+              "военный летчик 1 класса", "военный летчик-снайпер")
+
+# Доли сроков по состоянию на "сегодня": нет данных, просрочен, скоро истекает
+NO_DATA_SHARE = 0.03
+EXPIRED_SHARE = 0.07
+WARNING_SHARE = 0.10
+
+# Отпуск хранится датами, но это не срок действия - отдельный разброс
+VACATION_COLUMNS = ('vacation_start', 'vacation_end')
+
+def deadline(rng, today):
+    """Дата окончания срока: в основном действующие, часть просрочена или на исходе"""
+    roll = rng.random()
+    if roll < NO_DATA_SHARE:
+        return None
+    roll -= NO_DATA_SHARE
+    if roll < EXPIRED_SHARE:
+        return today - timedelta(days=rng.randint(1, 180))
+    roll -= EXPIRED_SHARE
+    if roll < WARNING_SHARE:
+        return today + timedelta(days=rng.randint(0, 30))
+    return today + timedelta(days=rng.randint(31, 365))
+
+def make_user(user_id, rng, today):
+    """Одна строка users в том виде, в каком ее возвращает database"""
+    user = {
+        'user_id': user_id,
+        'username': f"user{user_id}",
+        'fio': f"{rng.choice(SURNAMES)} {rng.choice(NAMES)} {rng.choice(PATRONYMICS)}",
+        'rank': rng.choice(RANKS),
+        'qual_rank': rng.choice(QUAL_RANKS),
+        'registered': True,
+    }
+    start = today + timedelta(days=rng.randint(-330, 330))
+    user['vacation_start'] = start
+    user['vacation_end'] = start + timedelta(days=rng.choice((15, 30, 45)))
+    for q in QUALIFICATIONS:
+        if q.column in VACATION_COLUMNS:
+            continue
+        value = deadline(rng, today)
+        if q.column == 'jumps_date':
+            # TEXT-колонка: ДД.ММ.ГГГГ или отметка об освобождении
+            if rng.random() < 0.05:
+                value = 'освобожден'
+            elif value is not None:
+                value = value.strftime("%d.%m.%Y")
+        user[q.column] = value
+    return user
+
+def make_users(count, today, seed=81, first_id=1_000_000):
+    """count пользователей; одинаковый seed дает одинаковый набор"""
+    rng = random.Random(seed)
+    return [make_user(first_id + i, rng, today) for i in range(count)]
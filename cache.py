@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+
+# Маркер "ключа нет в кэше" (None - допустимое закэшированное значение)
+MISSING = object()
+
+class TTLCache:
+    """
+    Кэш в памяти процесса с вытеснением давно не использованных
+    записей (LRU) и временем жизни записи (TTL).
+    """
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()  # ключ -> (истекает, значение)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Значение или MISSING"""
+        item = self._data.get(key)
+        if item is not None:
+            expires, value = item
+            if expires > self._clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return MISSING
+
+    def set(self, key, value):
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def items(self):
+        """Живые записи (ключ, значение), от старых к новым"""
+        now = self._clock()
+        return [(key, value) for key, (expires, value) in self._data.items() if expires > now]
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / requests if requests else 0.0,
+        }
@@ -0,0 +1,156 @@
+import logging
+from collections import Counter
+from qualifications import (
+    QUALIFICATIONS, EXPIRING_QUALIFICATIONS, EXPIRED, WARNING, OK, NO_DATA, EXEMPT, evaluate_user
+)
+
+logger = logging.getLogger(__name__)
+
+# Колонки, которых достаточно для evaluate_user при rollover
+_DATE_COLUMNS = tuple(q.column for q in QUALIFICATIONS)
+_COUNTED_COLUMNS = tuple(q.column for q in EXPIRING_QUALIFICATIONS)
+
+# Итоговый статус пользователя для статистики
+BANNED = 'banned'        # есть запрет на полеты
+ATTENTION = 'attention'  # запрета нет, но есть просрочки или скоро истекающие сроки
+READY = 'ready'          # все в порядке
+
+def user_level(status):
+    """Итоговый статус пользователя по результату evaluate_user"""
+    if status.is_banned:
+        return BANNED
+    if status.has_expired or status.has_warnings:
+        return ATTENTION
+    return READY
+
+def transition_dates(status):
+    """Даты (ordinal) после today, когда у пользователя сменится статус какого-либо срока"""
+    dates = set()
+    for field in status.fields.values():
+        if field.value is None or not field.qualification.tracks_expiry:
+            continue
+        warn_from = field.value.toordinal() - field.qualification.warn_days
+        expired_from = field.value.toordinal() + 1
+        for ordinal in (warn_from, expired_from):
+            if ordinal > status.today.toordinal():
+                dates.add(ordinal)
+    return dates
+
+class ComplianceCounters:
+    """
+    Счетчики для статистики админа, которые поддерживаются инкрементально.
+    
+    Полный расчет делается один раз (rebuild при старте). Дальше каждая
+    запись пользователя в БД обновляет только его вклад (upsert/remove),
+    а смена даты (rollover) пересчитывает лишь тех, у кого в этот день
+    меняется статус какого-либо срока.
+    
+    В памяти на пользователя - только кортеж дат сроков, кортеж уровней
+    (одинаковые кортежи общие) и ближайшая дата смены статуса, а не вся
+    строка из БД (ФИО, звание и т.д.).
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.today = None
+        self._levels = {}        # user_id -> (итоговый статус, уровни по _COUNTED_COLUMNS)
+        self._transitions = {}   # ordinal ближайшей смены статуса -> set(user_id)
+        self._level_tuples = {}  # общие экземпляры кортежей уровней
+        self._dates = {}         # user_id -> значения _DATE_COLUMNS (нужны для rollover)
+        self.status_counts = Counter()
+        self.field_counts = {q.column: Counter() for q in EXPIRING_QUALIFICATIONS}
+
+    def rebuild(self, users, today):
+        """Полный пересчет по списку зарегистрированных пользователей"""
+        self.__init__()
+        self.today = today
+        for user in users:
+            self._add(user)
+        self._built()
+
+    async def load(self, users, today):
+        """
+        Полный пересчет из асинхронного потока строк (database.iter_users):
+        весь состав разом в памяти не держится, а между порциями курсора
+        event loop свободен.
+        """
+        self.__init__()
+        self.today = today
+        async for user in users:
+            self._add(user)
+        self._built()
+
+    def upsert(self, user):
+        """Пользователь изменился (строка из БД после записи)"""
+        if not self.ready or not user:
+            return
+        self.remove(user['user_id'])
+        if user.get('registered'):
+            self._add(user)
+
+    def remove(self, user_id):
+        """Пользователь удален или снят с учета"""
+        if not self.ready:
+            return
+        previous = self._levels.pop(user_id, None)
+        self._dates.pop(user_id, None)
+        if previous is None:
+            return
+        level, fields = previous
+        self.status_counts[level] -= 1
+        for column, field_level in zip(_COUNTED_COLUMNS, fields):
+            self.field_counts[column][field_level] -= 1
+
+    def rollover(self, today):
+        """Перейти на новую дату: пересчитать только пользователей со сменой статуса"""
+        if not self.ready or today == self.today:
+            return
+        self.today = today
+        due = [ordinal for ordinal in self._transitions if ordinal <= today.toordinal()]
+        user_ids = set()
+        for ordinal in due:
+            user_ids |= self._transitions.pop(ordinal)
+        for user_id in user_ids:
+            dates = self._dates.get(user_id)
+            if dates is not None:
+                self.remove(user_id)
+                self._add(dict(zip(_DATE_COLUMNS, dates), user_id=user_id))
+        logger.info(f"📊 Счетчики статусов на {today}: пересчитано {len(user_ids)} пользователей")
+
+    def snapshot(self, today):
+        """
+        Текущие счетчики.
+        
+        Returns:
+            dict: {'total', 'statuses': {статус: n}, 'fields': {колонка: {уровень: n}}}
+        """
+        self.rollover(today)
+        return {
+            'total': len(self._levels),
+            'statuses': {level: self.status_counts[level] for level in (READY, ATTENTION, BANNED)},
+            'fields': {
+                column: {level: counts[level] for level in (EXPIRED, WARNING, OK, NO_DATA, EXEMPT)}
+                for column, counts in self.field_counts.items()
+            },
+        }
+
+    def _built(self):
+        self.ready = True
+        logger.info(f"📊 Счетчики статусов построены: {len(self._levels)} пользователей")
+
+    def _add(self, user):
+        status = evaluate_user(user, self.today)
+        level = user_level(status)
+        fields = tuple(status.fields[column].level for column in _COUNTED_COLUMNS)
+        fields = self._level_tuples.setdefault(fields, fields)
+        self._levels[user['user_id']] = (level, fields)
+        self._dates[user['user_id']] = tuple(user.get(column) for column in _DATE_COLUMNS)
+        self.status_counts[level] += 1
+        for column, field_level in zip(_COUNTED_COLUMNS, fields):
+            self.field_counts[column][field_level] += 1
+        # Достаточно ближайшей даты: при пересчете в этот день добавится следующая
+        dates = transition_dates(status)
+        if dates:
+            self._transitions.setdefault(min(dates), set()).add(user['user_id'])
+
+compliance_counters = ComplianceCounters()
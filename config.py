@@ -1,4 +1,5 @@
 import os
+import hashlib
 from dotenv import load_dotenv
 
 # Загружаем переменные окружения из файла .env (если есть)
@@ -22,6 +23,23 @@ DSN = os.getenv("DSN")
 # Порт для веб-сервера (health check)
 PORT = int(os.getenv("PORT", 8080))
 
+# ========== WEBHOOK ==========
+# Режим получения обновлений: webhook (True) или long polling (False)
+WEBHOOK_MODE = os.getenv("WEBHOOK_MODE", "False").lower() == "true"
+
+# Публичный адрес сервиса (Render подставляет RENDER_EXTERNAL_URL сам)
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_URL", os.getenv("RENDER_EXTERNAL_URL", "")).rstrip("/")
+
+# Путь, на котором aiohttp принимает обновления от Telegram
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+
+# Секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+# Если не задан - выводим из токена, чтобы он не менялся между перезапусками
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or hashlib.sha256((BOT_TOKEN or "").encode()).hexdigest()
+
+# Полный адрес webhook (пусто - webhook не настроен, работаем через polling)
+WEBHOOK_URL = f"{WEBHOOK_BASE_URL}{WEBHOOK_PATH}" if WEBHOOK_BASE_URL else ""
+
 # ========== LOGGING ==========
 # Уровень логирования
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -57,18 +75,69 @@ def is_owner(user_id):
 # Время жизни сессии FSM (в секундах)
 FSM_TIMEOUT = 3600  # 1 час
 
+# Как часто сбрасывать изменения FSM в БД (секунды)
+FSM_FLUSH_INTERVAL = 1.0
+
+# Последние сообщения бота (для удаления старых меню):
+# максимум чатов в памяти, время жизни записи (Telegram не удаляет
+# сообщения старше 48 часов) и сохранение в БД между перезапусками
+LAST_MESSAGES_MAX = 10000
+LAST_MESSAGES_TTL = 48 * 60 * 60
+LAST_MESSAGES_PERSIST = os.getenv("LAST_MESSAGES_PERSIST", "False").lower() == "true"
+
+# Пауза перед пакетным удалением старых сообщений (секунды)
+CLEANUP_BATCH_DELAY = 0.5
+
 # Максимальное количество попыток ввода
 MAX_INPUT_ATTEMPTS = 3
 
 # Задержка между запросами к API Telegram (секунды)
 TELEGRAM_RATE_LIMIT = 0.1
 
+# Сколько запросов можно отправить подряд без задержки
+TELEGRAM_BURST = 5
+
+# ========== РАССЫЛКА УВЕДОМЛЕНИЙ ==========
+# Сколько чатов обрабатывается одновременно
+NOTIFY_CONCURRENCY = 8
+
+# Повторы при сетевых ошибках и 5xx от Telegram
+NOTIFY_MAX_RETRIES = 3
+
+# Базовая задержка перед повтором (секунды), растет как 2^попытка
+NOTIFY_RETRY_BASE_DELAY = 1.0
+
 # ========== БАЗА ДАННЫХ ==========
 # Максимальное количество подключений к БД
-DB_POOL_SIZE = 10
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+
+# Минимальное количество подключений, которые пул держит открытыми
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
 
 # Таймаут подключения к БД (секунды)
-DB_TIMEOUT = 30
+DB_TIMEOUT = int(os.getenv("DB_TIMEOUT", "30"))
+
+# Запросы дольше порога (секунды) считаются медленными и пишутся в лог
+DB_SLOW_QUERY_THRESHOLD = float(os.getenv("DB_SLOW_QUERY_THRESHOLD", "0.2"))
+
+# Доля медленных SELECT, для которых снимается EXPLAIN (ANALYZE, BUFFERS)
+DB_EXPLAIN_SAMPLE_RATE = float(os.getenv("DB_EXPLAIN_SAMPLE_RATE", "0.1"))
+
+# Не чаще одного EXPLAIN на один и тот же запрос за это время (секунды)
+DB_EXPLAIN_INTERVAL = 600
+
+# Максимум результатов поиска по аэродромам
+SEARCH_RESULTS_LIMIT = int(os.getenv("SEARCH_RESULTS_LIMIT", "5"))
+
+# Сколько человек показывать на одной странице списка личного состава
+ROSTER_PAGE_SIZE = int(os.getenv("ROSTER_PAGE_SIZE", "20"))
+
+# Выгрузка /export: сколько строк курсор забирает с сервера за раз
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "500"))
+
+# Кэш строк пользователей в памяти: максимум записей и время жизни (секунды)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1000"))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
 
 # ========== ПЛАНИРОВЩИК (APSCHEDULER) ==========
 # Время проверки дедлайнов (каждые 6 часов)
@@ -77,6 +146,27 @@ SCHEDULER_CHECK_INTERVAL = 6 * 60 * 60
 # Часовой пояс для планировщика
 SCHEDULER_TIMEZONE = "Europe/Moscow"
 
+# Как часто перечитывать список админов из БД (секунды)
+ADMIN_REFRESH_INTERVAL = 300
+
+# ========== МОНИТОРИНГ ==========
+# Обновления дольше этого порога (секунды) пишутся в лог с разбивкой по времени
+SLOW_UPDATE_THRESHOLD = float(os.getenv("SLOW_UPDATE_THRESHOLD", "1.0"))
+
+# Как часто замерять задержку event loop (секунды) и сколько замеров хранить
+LOOP_LAG_INTERVAL = 0.5
+LOOP_LAG_WINDOW = 240
+
+# /ready отвечает 503, если p99 задержки event loop выше порога (секунды)
+READY_MAX_LOOP_LAG = float(os.getenv("READY_MAX_LOOP_LAG", "1.0"))
+
+# В режиме polling: максимальный возраст последнего успешного getUpdates (секунды)
+READY_MAX_POLL_AGE = int(os.getenv("READY_MAX_POLL_AGE", "90"))
+
+# Результат проверки БД кэшируется, чтобы частые пробы не нагружали пул (секунды)
+DB_PING_TTL = 10
+DB_PING_TIMEOUT = 3
+
 # ========== ОТЛАДКА ==========
 # Режим отладки (True/False)
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
@@ -1,71 +1,329 @@
+import time
+import asyncio
+import logging
 import asyncpg
-from config import DSN, ADMIN_ID
-from datetime import datetime
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from config import (
+    DSN, ADMIN_ID, DB_POOL_SIZE, DB_POOL_MIN_SIZE, DB_TIMEOUT,
+    SEARCH_RESULTS_LIMIT, ROSTER_PAGE_SIZE, USER_CACHE_SIZE, USER_CACHE_TTL, EXPORT_FETCH_SIZE
+)
+from keyboards import FIELD_MAP
+from qualifications import QUALIFICATIONS, EXPIRING_QUALIFICATIONS, DATE_FIELDS, convert_field_value
+from compliance import compliance_counters
+from cache import TTLCache, MISSING
+from roles import admin_registry
+from migrate import migrate
+from db_instrumentation import InstrumentedConnection, query_stats
+
+logger = logging.getLogger(__name__)
+
+# ========== ПУЛ ПОДКЛЮЧЕНИЙ ==========
+# Один пул на весь процесс: создается в main.main() при старте
+# и закрывается при остановке. Все хендлеры и планировщик берут
+# подключения из него, а не открывают новые TLS-сессии к Neon.
+_pool = None
+_pool_lock = asyncio.Lock()
+
+# Счетчики для get_pool_stats()
+_pool_stats = {
+    'waiters': 0,            # сколько корутин сейчас ждут подключение
+    'acquired_total': 0,     # всего выдано подключений
+    'acquire_time_total': 0.0,
+    'acquire_time_max': 0.0,
+}
+
+async def init_pool():
+    """Создать общий пул подключений (вызывается один раз при старте)"""
+    global _pool
+    async with _pool_lock:
+        if _pool is None:
+            min_size = min(DB_POOL_MIN_SIZE, DB_POOL_SIZE)
+            _pool = await asyncpg.create_pool(
+                DSN,
+                min_size=min_size,
+                max_size=DB_POOL_SIZE,
+                timeout=DB_TIMEOUT,
+                command_timeout=DB_TIMEOUT,
+                connection_class=InstrumentedConnection,
+            )
+            logger.info(f"✅ Пул БД создан (min={min_size}, max={DB_POOL_SIZE})")
+    return _pool
+
+async def close_pool():
+    """Закрыть общий пул подключений (вызывается при остановке)"""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+        logger.info("🛑 Пул БД закрыт")
 
 async def get_pool():
-    """Получить пул подключений к базе данных"""
-    return await asyncpg.create_pool(DSN)
+    """Получить общий пул подключений к базе данных"""
+    if _pool is None:
+        # Страховка для скриптов и тестов, где init_pool() не вызывали
+        return await init_pool()
+    return _pool
 
-async def init_db():
-    """Инициализация базы данных - создание таблиц"""
+@asynccontextmanager
+async def acquire():
+    """Взять подключение из общего пула с учетом времени ожидания"""
     pool = await get_pool()
-    async with pool.acquire() as conn:
-        # Таблица пользователей
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id BIGINT PRIMARY KEY,
-                username TEXT,
-                fio TEXT,
-                rank TEXT,
-                qual_rank TEXT,
-                vacation_start DATE,
-                vacation_end DATE,
-                vlk_date DATE,
-                umo_date DATE,
-                kbp_4_md_m DATE,
-                kbp_7_md_m DATE,
-                kbp_4_md_90a DATE,
-                kbp_7_md_90a DATE,
-                jumps_date TEXT,
-                registered BOOLEAN DEFAULT FALSE
-            )
-        """)
+    started = time.perf_counter()
+    _pool_stats['waiters'] += 1
+    try:
+        conn = await pool.acquire(timeout=DB_TIMEOUT)
+    finally:
+        _pool_stats['waiters'] -= 1
+    waited = time.perf_counter() - started
+    _pool_stats['acquired_total'] += 1
+    _pool_stats['acquire_time_total'] += waited
+    _pool_stats['acquire_time_max'] = max(_pool_stats['acquire_time_max'], waited)
+    query_stats.record_acquire(waited)
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+async def ping():
+    """Проверка доступности БД для /ready"""
+    async with acquire() as conn:
+        return await conn.fetchval("SELECT 1")
+
+def get_pool_stats():
+    """
+    Текущее состояние пула.
+
+    Returns:
+        dict: size, in_use, idle, max_size, waiters, acquired_total,
+        acquire_avg_ms, acquire_max_ms
+    """
+    acquired = _pool_stats['acquired_total']
+    stats = {
+        'size': 0,
+        'in_use': 0,
+        'idle': 0,
+        'max_size': DB_POOL_SIZE,
+        'waiters': _pool_stats['waiters'],
+        'acquired_total': acquired,
+        'acquire_avg_ms': (_pool_stats['acquire_time_total'] / acquired * 1000) if acquired else 0.0,
+        'acquire_max_ms': _pool_stats['acquire_time_max'] * 1000,
+    }
+    if _pool is not None:
+        size = _pool.get_size()
+        idle = _pool.get_idle_size()
+        stats.update(size=size, idle=idle, in_use=size - idle, max_size=_pool.get_max_size())
+    return stats
+
+def get_query_stats(limit=10):
+    """Самые тяжелые запросы и последние снятые планы"""
+    return {'top': query_stats.top(limit), 'plans': list(query_stats.plans)}
+
+# EXPLAIN медленных запросов снимается на отдельном подключении из пула
+query_stats.acquire = acquire
+
+async def init_db():
+    """
+    Привести схему БД к последней версии (migrations/*.sql, см. migrate.py).
+    На уже обновленной базе - один запрос к schema_version.
+    """
+    async with acquire() as conn:
+        return await migrate(conn)
+
+# ========== ФУНКЦИИ ПОЛЬЗОВАТЕЛЕЙ ==========
+
+# Все отслеживаемые сроки из реестра (jumps_date хранится текстом ДД.ММ.ГГГГ)
+DEADLINE_COLUMNS = tuple(q.column for q in QUALIFICATIONS)
+
+# Поля анкеты, которые заполняются при регистрации (в порядке колонок)
+REGISTRATION_FIELDS = (
+    'fio', 'rank', 'qual_rank', 'vacation_start', 'vacation_end',
+    'vlk_date', 'umo_date', 'kbp_4_md_m', 'kbp_7_md_m',
+    'kbp_4_md_90a', 'kbp_7_md_90a', 'jumps_date'
+)
+
+# Белый список колонок для обновления - берется из FIELD_MAP клавиатуры
+# редактирования. Составное поле 'vacation' хранится в двух колонках.
+COMPOSITE_FIELDS = {
+    'vacation': ('vacation_start', 'vacation_end'),
+}
+USER_COLUMNS = tuple(
+    column
+    for field in FIELD_MAP.values()
+    for column in COMPOSITE_FIELDS.get(field, (field,))
+)
+
+class UserRepository:
+    """
+    Доступ к таблице users.
+    
+    Тексты всех запросов фиксированы (один UPDATE на каждую колонку из
+    USER_COLUMNS), поэтому asyncpg кэширует prepared statement на каждом
+    подключении и не разбирает SQL повторно. Имена колонок никогда
+    не приходят в SQL из пользовательского ввода.
+    """
+
+    _GET_SQL = "SELECT * FROM users WHERE user_id = $1"
+    _ADD_SQL = (
+        "INSERT INTO users (user_id, username) VALUES ($1, $2) "
+        "ON CONFLICT (user_id) DO UPDATE SET username = $2 RETURNING *"
+    )
+    _SET_REGISTERED_SQL = "UPDATE users SET registered = TRUE WHERE user_id = $1 RETURNING *"
+    _LIST_REGISTERED_SQL = "SELECT * FROM users WHERE registered = TRUE"
+    _DELETE_SQL = "DELETE FROM users WHERE user_id = $1"
+    _UPDATE_SQL = {
+        column: f"UPDATE users SET {column} = $2 WHERE user_id = $1 RETURNING *"
+        for column in USER_COLUMNS
+    }
+    _REGISTER_SQL = """
+        INSERT INTO users (user_id, username, {columns}, registered)
+        VALUES ($1, $2, {placeholders}, TRUE)
+        ON CONFLICT (user_id) DO UPDATE
+        SET username = EXCLUDED.username, {updates}, registered = TRUE
+        RETURNING *
+    """.format(
+        columns=", ".join(REGISTRATION_FIELDS),
+        placeholders=", ".join(f"${i}" for i in range(3, len(REGISTRATION_FIELDS) + 3)),
+        updates=", ".join(f"{field} = EXCLUDED.{field}" for field in REGISTRATION_FIELDS),
+    )
+
+    def __init__(self, cache: Optional[TTLCache] = None):
+        # Запросы для обновления нескольких колонок сразу, ключ - кортеж колонок
+        self._multi_update_sql: Dict[Tuple[str, ...], str] = {}
+        # Read-through кэш строк: все записи идут через репозиторий и
+        # обновляют его, поэтому кэш не расходится с БД
+        self.cache = cache
+
+    @staticmethod
+    def _check_column(column: str) -> None:
+        if column not in USER_COLUMNS:
+            raise ValueError(f"Недопустимое поле пользователя: {column}")
+
+    def _get_multi_update_sql(self, columns: Tuple[str, ...]) -> str:
+        sql = self._multi_update_sql.get(columns)
+        if sql is None:
+            assignments = ", ".join(f"{column} = ${i}" for i, column in enumerate(columns, 2))
+            sql = f"UPDATE users SET {assignments} WHERE user_id = $1 RETURNING *"
+            self._multi_update_sql[columns] = sql
+        return sql
+
+    def _saved(self, row) -> Optional[Dict[str, Any]]:
+        """Строка после записи: обновляем кэш и счетчики статистики"""
+        if row is None:
+            return None
+        user = dict(row)
+        if self.cache is not None:
+            self.cache.set(user['user_id'], user)
+        compliance_counters.upsert(user)
+        return dict(user)
+
+    async def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Получить строку пользователя или None"""
+        if self.cache is not None:
+            cached = self.cache.get(user_id)
+            if cached is not MISSING:
+                return dict(cached) if cached else None
+        async with acquire() as conn:
+            row = await conn.fetchrow(self._GET_SQL, user_id)
+        user = dict(row) if row else None
+        if self.cache is not None:
+            self.cache.set(user_id, user)
+        return dict(user) if user else None
+
+    async def add(self, user_id: int, username: Optional[str]) -> Dict[str, Any]:
+        """
+        Добавить нового пользователя или обновить username.
         
-        # Таблица для "полезной информации" (аэродромы, телефоны)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS info_base (
-                id SERIAL PRIMARY KEY,
-                keyword TEXT,
-                content TEXT
-            )
-        """)
+        Если строка уже в кэше и username не изменился, запись в БД
+        не нужна: повторный /start обходится без запроса.
         
-        # Таблица администраторов
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS admins (
-                id SERIAL PRIMARY KEY,
-                user_id BIGINT UNIQUE,
-                added_by BIGINT,
-                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        Returns:
+            dict: строка пользователя
+        """
+        if self.cache is not None:
+            cached = self.cache.get(user_id)
+            if cached is not MISSING and cached and cached.get('username') == username:
+                return dict(cached)
+        async with acquire() as conn:
+            row = await conn.fetchrow(self._ADD_SQL, user_id, username)
+        user = dict(row)
+        if self.cache is not None:
+            self.cache.set(user_id, user)
+        return dict(user)
+
+    async def update_field(self, user_id: int, column: str, value: Any) -> Optional[Dict[str, Any]]:
+        """
+        Обновить одну колонку.
         
-        # Добавляем главного админа при первом запуске (защищен от удаления)
-        await conn.execute(
-            "INSERT INTO admins (user_id, added_by) VALUES ($1, $2) ON CONFLICT (user_id) DO NOTHING",
-            ADMIN_ID, 0  # 0 означает системного админа (главного)
-        )
+        Raises:
+            ValueError: колонка не входит в USER_COLUMNS или дата некорректна
+        
+        Returns:
+            dict or None: обновленная строка пользователя
+        """
+        self._check_column(column)
+        value = convert_field_value(column, value)
+        async with acquire() as conn:
+            row = await conn.fetchrow(self._UPDATE_SQL[column], user_id, value)
+            return self._saved(row)
 
-# ========== ФУНКЦИИ ПОЛЬЗОВАТЕЛЕЙ ==========
+    async def update_fields(self, user_id: int, **values: Any) -> Optional[Dict[str, Any]]:
+        """Обновить несколько колонок одним запросом"""
+        columns = tuple(sorted(values))
+        if not columns:
+            return await self.get(user_id)
+        for column in columns:
+            self._check_column(column)
+        converted = [convert_field_value(column, values[column]) for column in columns]
+        async with acquire() as conn:
+            row = await conn.fetchrow(self._get_multi_update_sql(columns), user_id, *converted)
+            return self._saved(row)
+
+    async def register(self, user_id: int, username: Optional[str], data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Сохранить анкету целиком и отметить пользователя зарегистрированным.
+        
+        Один оператор INSERT ... ON CONFLICT (одна транзакция, один round trip)
+        вместо отдельного UPDATE на каждый шаг регистрации.
+        
+        Raises:
+            ValueError: в анкете некорректная дата (ничего не записано)
+        """
+        values = [convert_field_value(field, data.get(field)) for field in REGISTRATION_FIELDS]
+        async with acquire() as conn:
+            row = await conn.fetchrow(self._REGISTER_SQL, user_id, username, *values)
+            return self._saved(row)
+
+    async def set_registered(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Отметить пользователя как зарегистрированного"""
+        async with acquire() as conn:
+            row = await conn.fetchrow(self._SET_REGISTERED_SQL, user_id)
+            return self._saved(row)
+
+    async def list_registered(self) -> List[Dict[str, Any]]:
+        """Все зарегистрированные пользователи"""
+        async with acquire() as conn:
+            rows = await conn.fetch(self._LIST_REGISTERED_SQL)
+            return [dict(row) for row in rows]
+
+    async def delete(self, user_id: int) -> None:
+        """Удалить пользователя"""
+        async with acquire() as conn:
+            await conn.execute(self._DELETE_SQL, user_id)
+        if self.cache is not None:
+            self.cache.pop(user_id)
+        compliance_counters.remove(user_id)
+
+users = UserRepository(cache=TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL))
+
+def get_user_cache_stats():
+    """Статистика кэша пользователей: size, hits, misses, hit_rate, ..."""
+    return users.cache.stats()
 
 async def add_user(user_id, username):
-    """Добавить нового пользователя или обновить username"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "INSERT INTO users (user_id, username) VALUES ($1, $2) ON CONFLICT (user_id) DO UPDATE SET username = $2",
-            user_id, username
-        )
+    """Добавить нового пользователя или обновить username, вернуть его строку"""
+    return await users.add(user_id, username)
 
 async def update_user_field(user_id, field, value):
     """
@@ -73,96 +331,340 @@ async def update_user_field(user_id, field, value):
     Автоматически преобразует строки дат в объекты date.
     Поддерживает значение 'освобожден' для jumps_date.
     """
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        # Список полей с датами (кроме jumps_date)
-        date_fields = [
-            'vacation_start', 'vacation_end', 'vlk_date', 'umo_date',
-            'kbp_4_md_m', 'kbp_7_md_m', 'kbp_4_md_90a', 'kbp_7_md_90a'
-        ]
-        
-        # Если поле - дата, преобразуем строку в объект date
-        if field in date_fields and value:
-            try:
-                value = datetime.strptime(value, "%d.%m.%Y").date()
-            except (ValueError, TypeError):
-                value = None
-        
-        # Для jumps_date - проверяем на "освобожден"
-        if field == 'jumps_date' and value:
-            if isinstance(value, str) and value.lower() in ['освобожден', 'освобождён', 'осв']:
-                value = 'освобожден'
-            else:
-                try:
-                    value = datetime.strptime(value, "%d.%m.%Y").date()
-                except (ValueError, TypeError):
-                    value = None
-        
-        query = f"UPDATE users SET {field} = $1 WHERE user_id = $2"
-        await conn.execute(query, value, user_id)
+    return await users.update_field(user_id, field, value)
+
+async def update_user_fields(user_id, **values):
+    """Обновить несколько полей пользователя одним запросом"""
+    return await users.update_fields(user_id, **values)
+
+async def register_user(user_id, username, data):
+    """
+    Сохранить анкету целиком (см. UserRepository.register).
+    
+    Args:
+        user_id: ID пользователя
+        username: username в Telegram
+        data: dict с ответами из FSM (ключи из REGISTRATION_FIELDS)
+    
+    Returns:
+        dict: сохраненная строка пользователя (RETURNING *)
+    """
+    return await users.register(user_id, username, data)
 
 async def set_registered(user_id):
     """Отметить пользователя как зарегистрированного"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute("UPDATE users SET registered = TRUE WHERE user_id = $1", user_id)
+    await users.set_registered(user_id)
 
 async def get_user(user_id):
     """Получить данные пользователя по user_id"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("SELECT * FROM users WHERE user_id = $1", user_id)
-        return dict(row) if row else None
+    return await users.get(user_id)
+
+def _build_due_deadlines_sql():
+    """
+    Один запрос на все сроки: UNION ALL по колонкам, каждая ветка
+    идет по своему частичному индексу idx_users_<колонка>.
+    $1 - целевые даты, $2 - они же строками ДД.ММ.ГГГГ, $3 - сегодня.
+    """
+    branches = []
+    for column in DEADLINE_COLUMNS:
+        if column not in DATE_FIELDS:
+            continue
+        branches.append(
+            f"SELECT user_id, fio, '{column}' AS field, {column} - $3::date AS days_left "
+            f"FROM users WHERE registered AND {column} = ANY($1::date[])"
+        )
+    branches.append(
+        "SELECT user_id, fio, 'jumps_date' AS field, "
+        "to_date(jumps_date, 'DD.MM.YYYY') - $3::date AS days_left "
+        "FROM users WHERE registered AND jumps_date = ANY($2::text[])"
+    )
+    return "\nUNION ALL\n".join(branches)
+
+_DUE_DEADLINES_SQL = _build_due_deadlines_sql()
+
+async def get_due_deadlines(today, days_before):
+    """
+    Найти сроки, до окончания которых осталось ровно N дней.
+    
+    Args:
+        today: дата "сегодня" (в часовом поясе планировщика)
+        days_before: список N, например (30, 14, 7, 0)
+    
+    Returns:
+        list: словари {'user_id', 'fio', 'field', 'days_left'}
+    """
+    targets = [today + timedelta(days=days) for days in days_before]
+    target_strings = [target.strftime("%d.%m.%Y") for target in targets]
+    async with acquire() as conn:
+        rows = await conn.fetch(_DUE_DEADLINES_SQL, targets, target_strings, today)
+        return [dict(row) for row in rows]
+
+# ========== СПИСОК ЛИЧНОГО СОСТАВА ПО СТРАНИЦАМ ==========
+
+# Фильтры списка
+ROSTER_FILTERS = ('all', 'red', 'warn')
+
+def _deadline_expr(column):
+    """SQL-выражение даты срока (jumps_date хранится текстом)"""
+    if column in DATE_FIELDS:
+        return column
+    return (
+        f"(CASE WHEN {column} ~ '^\\d{{2}}\\.\\d{{2}}\\.\\d{{4}}$' "
+        f"THEN to_date({column}, 'DD.MM.YYYY') END)"
+    )
+
+def _roster_filter_sql(roster_filter):
+    """Условие фильтра: $3 - сегодня"""
+    if roster_filter == 'red':
+        # Запрет на полеты: просрочен срок, влияющий на допуск
+        conditions = [
+            f"{_deadline_expr(q.column)} < $3::date"
+            for q in QUALIFICATIONS if q.bans_flight
+        ]
+    elif roster_filter == 'warn':
+        # Срок истекает в пределах окна предупреждения (отпуск - не срок действия)
+        conditions = [
+            f"{_deadline_expr(q.column)} BETWEEN $3::date AND $3::date + {q.warn_days}"
+            for q in EXPIRING_QUALIFICATIONS
+        ]
+    else:
+        return "$3::date IS NOT NULL"
+    return "(" + " OR ".join(conditions) + ")"
+
+def _build_roster_sql():
+    """
+    Запросы страницы: keyset по (coalesce(fio, ''), user_id), индекс
+    idx_users_roster. $1 - user_id курсора, $2 - размер страницы + 1.
+    """
+    key = "(coalesce(fio, ''), user_id)"
+    cursor = "(SELECT coalesce(fio, ''), user_id FROM users WHERE user_id = $1)"
+    queries = {}
+    for roster_filter in ROSTER_FILTERS:
+        condition = _roster_filter_sql(roster_filter)
+        queries[(roster_filter, 'first')] = (
+            f"SELECT * FROM users WHERE registered AND {condition} "
+            f"AND $1::bigint IS NULL "
+            f"ORDER BY coalesce(fio, ''), user_id LIMIT $2"
+        )
+        queries[(roster_filter, 'next')] = (
+            f"SELECT * FROM users WHERE registered AND {condition} AND {key} > {cursor} "
+            f"ORDER BY coalesce(fio, ''), user_id LIMIT $2"
+        )
+        queries[(roster_filter, 'prev')] = (
+            f"SELECT * FROM users WHERE registered AND {condition} AND {key} < {cursor} "
+            f"ORDER BY coalesce(fio, '') DESC, user_id DESC LIMIT $2"
+        )
+    return queries
+
+_ROSTER_SQL = _build_roster_sql()
+
+async def get_users_page(today, roster_filter='all', direction='first', cursor=None, limit=ROSTER_PAGE_SIZE):
+    """
+    Одна страница списка личного состава.
+    
+    Args:
+        today: дата для фильтров 'red' / 'warn'
+        roster_filter: 'all', 'red' (есть запрет) или 'warn' (скоро истекает)
+        direction: 'first', 'next' (после cursor) или 'prev' (до cursor)
+        cursor: user_id крайней записи текущей страницы
+        limit: размер страницы
+    
+    Returns:
+        dict: {'users': [...], 'has_prev': bool, 'has_next': bool}
+    """
+    if roster_filter not in ROSTER_FILTERS:
+        roster_filter = 'all'
+    if direction not in ('next', 'prev') or cursor is None:
+        direction, cursor = 'first', None
+    
+    async with acquire() as conn:
+        rows = await conn.fetch(_ROSTER_SQL[(roster_filter, direction)], cursor, limit + 1, today)
+    
+    more = len(rows) > limit
+    users = [dict(row) for row in rows[:limit]]
+    if direction == 'prev':
+        users.reverse()
+        return {'users': users, 'has_prev': more, 'has_next': True}
+    return {'users': users, 'has_prev': direction == 'next', 'has_next': more}
+
+async def iter_users(prefetch=EXPORT_FETCH_SIZE):
+    """
+    Все зарегистрированные пользователи по одному, в порядке списка.
+    
+    Строки читаются серверным курсором порциями по prefetch: в памяти
+    одна порция, а не весь состав. Подключение занято, пока идет обход.
+    """
+    async with acquire() as conn:
+        # Курсор asyncpg живет только внутри транзакции
+        async with conn.transaction(readonly=True):
+            cursor = conn.cursor(
+                "SELECT * FROM users WHERE registered ORDER BY coalesce(fio, ''), user_id",
+                prefetch=prefetch,
+            )
+            async for row in cursor:
+                yield dict(row)
 
 async def get_all_users():
     """Получить всех зарегистрированных пользователей"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        rows = await conn.fetch("SELECT * FROM users WHERE registered = TRUE")
-        return [dict(row) for row in rows]
+    return await users.list_registered()
 
 async def delete_user(user_id):
     """Удалить пользователя из базы"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute("DELETE FROM users WHERE user_id = $1", user_id)
+    await users.delete(user_id)
 
 # ========== ФУНКЦИИ ИНФОРМАЦИИ (АЭРОДРОМЫ) ==========
 
-async def search_info(keyword):
-    """Поиск информации по ключевому слову"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        rows = await conn.fetch("SELECT content FROM info_base WHERE keyword ILIKE $1", f"%{keyword}%")
+# Ранжированный поиск: точное совпадение, затем начало слова, затем
+# похожесть по триграммам. Оба условия WHERE обслуживает GIN-индекс
+# idx_info_base_keyword_trgm.
+_SEARCH_INFO_SQL = """
+    SELECT content
+    FROM (
+        SELECT content, replace(lower(keyword), 'ё', 'е') AS norm
+        FROM info_base
+        WHERE replace(lower(keyword), 'ё', 'е') LIKE $2
+           OR replace(lower(keyword), 'ё', 'е') % $1
+    ) found
+    ORDER BY
+        CASE WHEN norm = $1 THEN 0 WHEN norm LIKE $3 THEN 1 ELSE 2 END,
+        similarity(norm, $1) DESC,
+        norm
+    LIMIT $4
+"""
+
+def normalize_keyword(text):
+    """Нормализация для поиска: регистр, пробелы, ё -> е"""
+    return " ".join((text or "").lower().replace('ё', 'е').split())
+
+def _escape_like(text):
+    """Экранировать спецсимволы LIKE"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+async def search_info(keyword, limit=SEARCH_RESULTS_LIMIT):
+    """
+    Поиск информации по ключевому слову.
+    
+    Returns:
+        list: content найденных записей, самые релевантные первыми
+    """
+    query = normalize_keyword(keyword)
+    if not query:
+        return []
+    pattern = _escape_like(query)
+    async with acquire() as conn:
+        rows = await conn.fetch(_SEARCH_INFO_SQL, query, f"%{pattern}%", f"{pattern}%", limit)
         return [row['content'] for row in rows]
 
 async def add_info(keyword, content):
-    """Добавить информацию в базу (для админа)"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute("INSERT INTO info_base (keyword, content) VALUES ($1, $2)", keyword, content)
+    """Добавить информацию в базу (для админа), существующая запись обновляется"""
+    async with acquire() as conn:
+        await conn.execute(
+            "INSERT INTO info_base (keyword, content) VALUES ($1, $2) "
+            "ON CONFLICT (keyword) DO UPDATE SET content = EXCLUDED.content",
+            keyword, content
+        )
+
+async def bulk_upsert_info(entries):
+    """
+    Загрузить справочник целиком одной транзакцией.
+    
+    Записи копируются во временную таблицу через COPY и вливаются
+    в info_base одним INSERT ... ON CONFLICT. Повторный запуск безопасен:
+    совпадающие записи не трогаются.
+    
+    Args:
+        entries: список пар (keyword, content); при повторе keyword
+            побеждает последняя пара
+    
+    Returns:
+        dict: {'total', 'inserted', 'updated', 'unchanged'}
+    """
+    records = list(dict(entries).items())
+    async with acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                "CREATE TEMP TABLE info_import (keyword TEXT, content TEXT) ON COMMIT DROP"
+            )
+            await conn.copy_records_to_table('info_import', records=records)
+            rows = await conn.fetch("""
+                INSERT INTO info_base (keyword, content)
+                SELECT keyword, content FROM info_import
+                ON CONFLICT (keyword) DO UPDATE SET content = EXCLUDED.content
+                WHERE info_base.content IS DISTINCT FROM EXCLUDED.content
+                RETURNING (xmax = 0) AS inserted
+            """)
+    inserted = sum(1 for row in rows if row['inserted'])
+    updated = len(rows) - inserted
+    return {
+        'total': len(records),
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': len(records) - inserted - updated,
+    }
 
 async def delete_info(keyword):
     """Удалить информацию из базы по ключевому слову"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
+    async with acquire() as conn:
         await conn.execute("DELETE FROM info_base WHERE keyword = $1", keyword)
 
 async def get_all_info():
     """Получить всю информацию из базы (для админа)"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
+    async with acquire() as conn:
         rows = await conn.fetch("SELECT keyword, content FROM info_base")
         return [dict(row) for row in rows]
 
+# ========== ПОСЛЕДНИЕ СООБЩЕНИЯ БОТА ==========
+
+async def save_last_message(chat_id, message_id):
+    """Запомнить последнее сообщение бота в чате"""
+    async with acquire() as conn:
+        await conn.execute(
+            "INSERT INTO last_bot_messages (chat_id, message_id, sent_at) VALUES ($1, $2, now()) "
+            "ON CONFLICT (chat_id) DO UPDATE SET message_id = EXCLUDED.message_id, sent_at = now()",
+            chat_id, message_id
+        )
+
+async def load_last_messages(max_age, limit):
+    """
+    Свежие записи последних сообщений (старые заодно удаляются).
+    
+    Returns:
+        list: пары (chat_id, message_id), от старых к новым
+    """
+    async with acquire() as conn:
+        await conn.execute(
+            "DELETE FROM last_bot_messages WHERE sent_at < now() - make_interval(secs => $1)",
+            float(max_age)
+        )
+        rows = await conn.fetch(
+            "SELECT chat_id, message_id FROM ("
+            "  SELECT chat_id, message_id, sent_at FROM last_bot_messages"
+            "  ORDER BY sent_at DESC LIMIT $1"
+            ") recent ORDER BY sent_at",
+            limit
+        )
+        return [(row['chat_id'], row['message_id']) for row in rows]
+
 # ========== ФУНКЦИИ УПРАВЛЕНИЯ АДМИНАМИ ==========
 
+async def load_admins():
+    """Загрузить список админов из БД в admin_registry (при старте и периодически)"""
+    async with acquire() as conn:
+        rows = await conn.fetch("SELECT user_id FROM admins")
+        admin_ids = {row['user_id'] for row in rows}
+        if ADMIN_ID not in admin_ids:
+            # Главный админ записывается при первом запуске (или после смены ADMIN_ID)
+            await conn.execute(
+                "INSERT INTO admins (user_id, added_by) VALUES ($1, $2) ON CONFLICT (user_id) DO NOTHING",
+                ADMIN_ID, 0  # 0 означает системного админа (главного)
+            )
+            admin_ids.add(ADMIN_ID)
+    admin_registry.replace(admin_ids)
+    logger.info(f"🛡 Загружено админов: {len(admin_registry)}")
+
 async def is_admin(user_id):
-    """Проверяет является ли пользователь админом"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("SELECT user_id FROM admins WHERE user_id = $1", user_id)
-        return row is not None
+    """Проверяет является ли пользователь админом (по списку в памяти)"""
+    return admin_registry.is_admin(user_id)
 
 async def is_super_admin(user_id):
     """
@@ -190,12 +692,17 @@ async def add_admin(target_user_id, added_by_user_id):
     if await is_admin(target_user_id):
         return False, f"❌ Пользователь {target_user_id} уже является админом"
     
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "INSERT INTO admins (user_id, added_by) VALUES ($1, $2)",
+    async with acquire() as conn:
+        inserted = await conn.fetchval(
+            "INSERT INTO admins (user_id, added_by) VALUES ($1, $2) "
+            "ON CONFLICT (user_id) DO NOTHING RETURNING user_id",
             target_user_id, added_by_user_id
         )
+    admin_registry.add(target_user_id)
+    
+    # Список в памяти мог отстать от БД - запись уже была
+    if inserted is None:
+        return False, f"❌ Пользователь {target_user_id} уже является админом"
     
     return True, f"✅ Пользователь {target_user_id} добавлен в администраторы"
 
@@ -218,14 +725,12 @@ async def remove_admin(target_user_id, removed_by_user_id):
     if target_user_id == removed_by_user_id:
         return False, "❌ Нельзя удалить самого себя. Попросите другого админа."
     
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        # Проверяем существует ли админ
-        row = await conn.fetchrow("SELECT user_id FROM admins WHERE user_id = $1", target_user_id)
-        if not row:
-            return False, f"❌ Пользователь {target_user_id} не является админом"
-        
-        await conn.execute("DELETE FROM admins WHERE user_id = $1", target_user_id)
+    async with acquire() as conn:
+        # Удаляем и сразу узнаем, был ли такой админ
+        row = await conn.fetchrow("DELETE FROM admins WHERE user_id = $1 RETURNING user_id", target_user_id)
+    admin_registry.discard(target_user_id)
+    if not row:
+        return False, f"❌ Пользователь {target_user_id} не является админом"
     
     return True, f"✅ Пользователь {target_user_id} удален из администраторов"
 
@@ -236,8 +741,7 @@ async def get_all_admins():
     Returns:
         list: Список словарей с информацией об админах
     """
-    pool = await get_pool()
-    async with pool.acquire() as conn:
+    async with acquire() as conn:
         rows = await conn.fetch("SELECT user_id, added_by, added_at FROM admins ORDER BY added_at")
         return [dict(row) for row in rows]
 
@@ -251,8 +755,7 @@ async def get_admin_info(user_id):
     Returns:
         dict or None: Информация об админе или None
     """
-    pool = await get_pool()
-    async with pool.acquire() as conn:
+    async with acquire() as conn:
         row = await conn.fetchrow(
             "SELECT user_id, added_by, added_at FROM admins WHERE user_id = $1",
             user_id
@@ -261,7 +764,6 @@ async def get_admin_info(user_id):
 
 async def get_admin_count():
     """Получить количество админов"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
+    async with acquire() as conn:
         row = await conn.fetchrow("SELECT COUNT(*) as count FROM admins")
         return row['count'] if row else 0
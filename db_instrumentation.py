@@ -0,0 +1,213 @@
+import re
+import time
+import random
+import asyncio
+import logging
+import asyncpg
+from collections import deque
+from contextvars import ContextVar
+from config import DB_SLOW_QUERY_THRESHOLD, DB_EXPLAIN_SAMPLE_RATE, DB_EXPLAIN_INTERVAL
+from metrics import DB_QUERY_DURATION, DB_QUERY_ERRORS, DB_ACQUIRE_DURATION, current_timing
+
+logger = logging.getLogger(__name__)
+
+# Внутри фоновой задачи EXPLAIN: ее запросы не учитываются
+_inspecting = ContextVar("db_inspecting", default=False)
+
+_SPACES = re.compile(r"\s+")
+
+def statement_key(sql):
+    """Текст запроса в одну строку - ключ статистики"""
+    return _SPACES.sub(" ", sql).strip()
+
+def status_rows(status):
+    """Число строк из статуса команды: 'UPDATE 3' -> 3, 'CREATE TABLE' -> 0"""
+    tail = status.rsplit(" ", 1)[-1] if status else ""
+    return int(tail) if tail.isdigit() else 0
+
+# Команды управления транзакцией (conn.transaction()) - не запросы приложения
+_TRANSACTION_CONTROL = ("BEGIN", "START", "COMMIT", "END", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+def _head(sql):
+    return sql.lstrip().split(None, 1)[0].rstrip(";").upper() if sql.strip() else ""
+
+def is_transaction_control(sql):
+    return _head(sql) in _TRANSACTION_CONTROL
+
+def _is_select(sql):
+    # Несколько операторов через ";" в EXPLAIN не передать
+    return _head(sql) in ("SELECT", "WITH") and ";" not in sql.strip().rstrip(";")
+
+class StatementStats:
+    """Накопленная статистика одного запроса"""
+
+    __slots__ = ("calls", "errors", "rows", "total_time", "max_time", "slow")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.slow = 0
+
+class QueryStats:
+    """
+    Статистика по запросам процесса: время, строки, ошибки.
+    Для медленных SELECT выборочно снимает EXPLAIN (ANALYZE, BUFFERS)
+    в фоне, на отдельном подключении и в откатываемой транзакции.
+    """
+
+    # Ключ, под которым копятся запросы сверх лимита различных текстов
+    OTHER = "<other>"
+
+    def __init__(self, slow_threshold=DB_SLOW_QUERY_THRESHOLD, explain_rate=DB_EXPLAIN_SAMPLE_RATE,
+                 explain_interval=DB_EXPLAIN_INTERVAL, max_statements=500, max_plans=20):
+        self.slow_threshold = slow_threshold
+        self.explain_rate = explain_rate
+        self.explain_interval = explain_interval
+        self.max_statements = max_statements
+        self.statements = {}
+        self.plans = deque(maxlen=max_plans)
+        # Источник подключений для EXPLAIN (database.acquire), задается при импорте database
+        self.acquire = None
+        self._explained_at = {}
+        self._explain_task = None
+
+    def record(self, sql, operation, elapsed, rows=0, args=(), failed=False):
+        """Учесть выполненный запрос"""
+        if _inspecting.get():
+            return
+        DB_QUERY_DURATION.observe(elapsed, operation)
+        if failed:
+            DB_QUERY_ERRORS.inc(operation)
+        timing = current_timing.get()
+        if timing is not None:
+            timing.add_db(elapsed)
+
+        key = statement_key(sql)
+        stats = self.statements.get(key)
+        if stats is None:
+            if len(self.statements) >= self.max_statements:
+                key = self.OTHER
+                stats = self.statements.setdefault(key, StatementStats())
+            else:
+                stats = self.statements[key] = StatementStats()
+        stats.calls += 1
+        stats.rows += rows
+        stats.total_time += elapsed
+        stats.max_time = max(stats.max_time, elapsed)
+        if failed:
+            stats.errors += 1
+
+        if elapsed >= self.slow_threshold and not failed:
+            stats.slow += 1
+            logger.warning(f"🐢 Медленный запрос {elapsed:.3f} с ({rows} стр.): {key[:200]}")
+            if key != self.OTHER and _is_select(sql):
+                self._maybe_explain(key, sql, args, elapsed)
+
+    def record_acquire(self, waited):
+        """Учесть ожидание подключения из пула (итоги - в database.get_pool_stats)"""
+        DB_ACQUIRE_DURATION.observe(waited)
+        timing = current_timing.get()
+        if timing is not None:
+            timing.add_db_wait(waited)
+
+    def top(self, limit=10, order_by="total_time"):
+        """Самые тяжелые запросы: список dict с полями StatementStats и sql"""
+        items = sorted(self.statements.items(), key=lambda item: getattr(item[1], order_by), reverse=True)
+        return [
+            {
+                'sql': sql,
+                'calls': stats.calls,
+                'errors': stats.errors,
+                'rows': stats.rows,
+                'slow': stats.slow,
+                'total_ms': stats.total_time * 1000,
+                'avg_ms': stats.total_time / stats.calls * 1000 if stats.calls else 0.0,
+                'max_ms': stats.max_time * 1000,
+            }
+            for sql, stats in items[:limit]
+        ]
+
+    def reset(self):
+        self.statements.clear()
+        self.plans.clear()
+        self._explained_at.clear()
+
+    def _maybe_explain(self, key, sql, args, elapsed):
+        if self.acquire is None or random.random() >= self.explain_rate:
+            return
+        if self._explain_task is not None and not self._explain_task.done():
+            return  # Один EXPLAIN за раз: он сам нагружает базу
+        now = time.monotonic()
+        if now - self._explained_at.get(key, -self.explain_interval) < self.explain_interval:
+            return
+        self._explained_at[key] = now
+        self._explain_task = asyncio.create_task(self._explain(key, sql, args, elapsed))
+
+    async def _explain(self, key, sql, args, elapsed):
+        # Запросы EXPLAIN не попадают ни в статистику, ни во время обновления
+        _inspecting.set(True)
+        current_timing.set(None)
+        try:
+            async with self.acquire() as conn:
+                transaction = conn.transaction()
+                await transaction.start()
+                try:
+                    rows = await conn.fetch(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", *args)
+                finally:
+                    # ANALYZE выполняет запрос - ничего не фиксируем
+                    await transaction.rollback()
+        except Exception as e:
+            # Например, запрос ссылается на временную таблицу другого подключения
+            logger.debug(f"EXPLAIN не снят: {e}")
+            return
+        plan = "\n".join(row[0] for row in rows)
+        self.plans.append({'sql': key, 'elapsed_ms': elapsed * 1000, 'plan': plan, 'captured_at': time.time()})
+        logger.info(f"🔎 План медленного запроса ({elapsed:.3f} с): {key[:200]}\n{plan}")
+
+query_stats = QueryStats()
+
+class InstrumentedConnection(asyncpg.Connection):
+    """
+    Подключение пула, которое отчитывается о каждом запросе в query_stats.
+    Служебные команды не учитываются: сброс подключения при возврате
+    в пул (Connection.reset) и BEGIN/COMMIT/ROLLBACK от conn.transaction().
+    """
+
+    async def _measure(self, sql, operation, call, args=(), count_rows=None):
+        started = time.perf_counter()
+        try:
+            result = await call
+        except Exception:
+            query_stats.record(sql, operation, time.perf_counter() - started, args=args, failed=True)
+            raise
+        rows = count_rows(result) if count_rows else 0
+        query_stats.record(sql, operation, time.perf_counter() - started, rows, args)
+        return result
+
+    async def execute(self, query, *args, **kwargs):
+        if not args and (query == self.get_reset_query() or is_transaction_control(query)):
+            return await super().execute(query, *args, **kwargs)
+        return await self._measure(query, "execute", super().execute(query, *args, **kwargs), args, status_rows)
+
+    async def executemany(self, command, args, **kwargs):
+        args = list(args)
+        return await self._measure(command, "executemany", super().executemany(command, args, **kwargs),
+                                   count_rows=lambda _: len(args))
+
+    async def fetch(self, query, *args, **kwargs):
+        return await self._measure(query, "fetch", super().fetch(query, *args, **kwargs), args, len)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        return await self._measure(query, "fetchrow", super().fetchrow(query, *args, **kwargs), args,
+                                   lambda row: 0 if row is None else 1)
+
+    async def fetchval(self, query, *args, **kwargs):
+        return await self._measure(query, "fetchval", super().fetchval(query, *args, **kwargs), args,
+                                   lambda value: 0 if value is None else 1)
+
+    async def copy_records_to_table(self, table_name, **kwargs):
+        return await self._measure(f"COPY {table_name}", "copy",
+                                   super().copy_records_to_table(table_name, **kwargs), count_rows=status_rows)
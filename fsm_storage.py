@@ -0,0 +1,192 @@
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from database import acquire
+from config import FSM_TIMEOUT, FSM_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _Record:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    touched: float = field(default_factory=time.monotonic)
+    # Когда updated_at в БД последний раз сдвигался (0 - неизвестно)
+    saved: float = 0.0
+
+def _key_params(key: StorageKey):
+    return key.bot_id, key.chat_id, key.user_id, key.thread_id or 0, key.destiny
+
+class PostgresStorage(BaseStorage):
+    """
+    FSM-хранилище в таблице fsm_state поверх общего пула asyncpg.
+    
+    - Горячий слой в памяти: чтения после первой загрузки не ходят в БД.
+    - Запись отложенная: set_state + update_data, которые хендлер делает
+      подряд, помечают ключ "грязным", и фоновая задача раз в
+      FSM_FLUSH_INTERVAL секунд пишет все изменения одной транзакцией.
+    - Сессии без активности дольше FSM_TIMEOUT удаляются из памяти и из БД.
+      Чтения меняют только время в памяти, поэтому перед удалением из БД
+      updated_at живых сессий продлевается.
+    """
+
+    _LOAD_SQL = """
+        SELECT state, data FROM fsm_state
+        WHERE bot_id = $1 AND chat_id = $2 AND user_id = $3 AND thread_id = $4 AND destiny = $5
+          AND updated_at > now() - make_interval(secs => $6)
+    """
+    _UPSERT_SQL = """
+        INSERT INTO fsm_state (bot_id, chat_id, user_id, thread_id, destiny, state, data, updated_at)
+        VALUES ($1, $2, $3, $4, $5, $6, $7::jsonb, now())
+        ON CONFLICT (bot_id, chat_id, user_id, thread_id, destiny)
+        DO UPDATE SET state = EXCLUDED.state, data = EXCLUDED.data, updated_at = now()
+    """
+    _DELETE_SQL = """
+        DELETE FROM fsm_state
+        WHERE bot_id = $1 AND chat_id = $2 AND user_id = $3 AND thread_id = $4 AND destiny = $5
+    """
+    _TOUCH_SQL = """
+        UPDATE fsm_state SET updated_at = now()
+        WHERE bot_id = $1 AND chat_id = $2 AND user_id = $3 AND thread_id = $4 AND destiny = $5
+    """
+    _EXPIRE_SQL = "DELETE FROM fsm_state WHERE updated_at < now() - make_interval(secs => $1)"
+
+    def __init__(self, ttl=FSM_TIMEOUT, flush_interval=FSM_FLUSH_INTERVAL):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self._records: Dict[StorageKey, _Record] = {}
+        self._dirty = set()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self._last_sweep = time.monotonic()
+
+    def __len__(self):
+        return len(self._records)
+
+    def start(self):
+        """Запустить фоновую запись (после init_pool)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._dirty.add(key)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._get_record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._get_record(key)
+        record.data = data.copy()
+        self._dirty.add(key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._get_record(key)).data.copy()
+
+    async def _get_record(self, key: StorageKey) -> _Record:
+        record = self._records.get(key)
+        now = time.monotonic()
+        if record is not None and now - record.touched <= self.ttl:
+            record.touched = now
+            return record
+        
+        # Холодный ключ: одно чтение из БД, дальше работаем из памяти
+        record = _Record()
+        async with acquire() as conn:
+            row = await conn.fetchrow(self._LOAD_SQL, *_key_params(key), float(self.ttl))
+        if row is not None:
+            record.state = row['state']
+            record.data = json.loads(row['data']) if row['data'] else {}
+        
+        # Пока ждали БД, ключ мог загрузить параллельный апдейт
+        existing = self._records.get(key)
+        if existing is not None and now - existing.touched <= self.ttl:
+            return existing
+        self._records[key] = record
+        return record
+
+    async def flush(self):
+        """Записать все накопленные изменения одной транзакцией"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            started = time.monotonic()
+            upserts, deletes, saved = [], [], []
+            for key in dirty:
+                record = self._records.get(key)
+                if record is None or (record.state is None and not record.data):
+                    deletes.append(_key_params(key))
+                else:
+                    saved.append(record)
+                    upserts.append((
+                        *_key_params(key), record.state,
+                        json.dumps(record.data, ensure_ascii=False, default=str)
+                    ))
+            try:
+                async with acquire() as conn:
+                    async with conn.transaction():
+                        if upserts:
+                            await conn.executemany(self._UPSERT_SQL, upserts)
+                        if deletes:
+                            await conn.executemany(self._DELETE_SQL, deletes)
+            except Exception as e:
+                # Не теряем изменения: попробуем в следующий раз
+                self._dirty |= dirty
+                logger.error(f"❌ Не удалось сохранить FSM: {e}")
+                return
+            for record in saved:
+                record.saved = started
+
+    def _expire(self):
+        """Убрать из памяти сессии без активности дольше ttl"""
+        now = time.monotonic()
+        expired = [key for key, record in self._records.items() if now - record.touched > self.ttl]
+        for key in expired:
+            del self._records[key]
+            # Грязный ключ уйдет в БД как удаление
+        return len(expired)
+
+    async def _sweep(self):
+        """Удалить просроченные сессии из памяти и из БД"""
+        if self._expire():
+            await self.flush()
+        # Сессии, которые с последней записи только читали: в БД их
+        # updated_at устарел, и _EXPIRE_SQL удалил бы живое состояние
+        started = time.monotonic()
+        alive = [
+            key for key, record in self._records.items()
+            if record.touched > record.saved and (record.state is not None or record.data)
+        ]
+        async with acquire() as conn:
+            async with conn.transaction():
+                if alive:
+                    await conn.executemany(self._TOUCH_SQL, [_key_params(key) for key in alive])
+                await conn.execute(self._EXPIRE_SQL, float(self.ttl))
+        for key in alive:
+            record = self._records.get(key)
+            if record is not None:
+                record.saved = started
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_sweep >= 60:
+                    self._last_sweep = time.monotonic()
+                    await self._sweep()
+            except Exception as e:
+                logger.error(f"❌ Ошибка фоновой записи FSM: {e}")
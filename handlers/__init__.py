@@ -1,8 +1,13 @@
-from . import auth
-from . import profile
-from . import search
-from . import admin
-from . import admin_airports
-from . import common
+from aiogram import Router
+from . import start, profile, search, admin, text_handler
 
-__all__ = ['auth', 'profile', 'search', 'admin', 'admin_airports', 'common']
+router = Router()
+
+router.include_router(start.router)
+router.include_router(profile.router)
+router.include_router(search.router)
+router.include_router(admin.router)
+# Ловит любой текст вне сценариев - подключается последним
+router.include_router(text_handler.router)
+
+__all__ = ['router']
@@ -3,12 +3,10 @@ from aiogram.fsm.context import FSMContext
 from database import get_all_users, get_all_admins, add_admin, remove_admin
 from keyboards import get_admin_menu, get_admin_manage_menu
 from config import ADMIN_ID
+from .common import is_admin_check
 
 router = Router()
 
-def is_admin_check(user_id):
-    return user_id == ADMIN_ID
-
 @router.message(F.text == "🛡 Функции админа")
 async def admin_menu_button(message: types.Message):
     if not is_admin_check(message.from_user.id):
@@ -1,10 +1,11 @@
 from aiogram import Router
-from . import list, stats, airports, manage, test
+from . import list, stats, export, airports, manage, test
 
 router = Router()
 
 router.include_router(list.router)
 router.include_router(stats.router)
+router.include_router(export.router)
 router.include_router(airports.router)
 router.include_router(manage.router)
 router.include_router(test.router)
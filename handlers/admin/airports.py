@@ -1,19 +1,41 @@
-import asyncio
+import time
 import logging
 from aiogram import Router, F, types
 from aiogram.filters import Command
 from airports_data import AIRPORTS
-from database import add_info
+from database import bulk_upsert_info
 from ..common import cleanup_last_bot_message, send_and_save, is_admin_check  # ✅ ..common
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+def format_load_result(result, elapsed):
+    """Текст отчета о загрузке справочника"""
+    return (
+        f"✅ <b>Заполнение завершено!</b>\n\n"
+        f"📊 <b>Статистика:</b>\n"
+        f"➕ Добавлено: {result['inserted']}\n"
+        f"✏️ Обновлено: {result['updated']}\n"
+        f"⏺ Без изменений: {result['unchanged']}\n"
+        f"⏱ Время: {elapsed:.2f} с"
+    )
+
+async def load_airports():
+    """Загрузить AIRPORTS в базу одной транзакцией, вернуть (результат, секунды)"""
+    started = time.perf_counter()
+    result = await bulk_upsert_info(AIRPORTS)
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"✅ Аэродромы загружены за {elapsed:.2f} с: добавлено {result['inserted']}, "
+        f"обновлено {result['updated']}, без изменений {result['unchanged']}"
+    )
+    return result, elapsed
+
 @router.callback_query(F.data == "admin_fill_airports")
 async def admin_fill_airports_callback(callback: types.CallbackQuery):
     if not is_admin_check(callback.from_user.id):
         return
-    
+
     try:
         airport_count = len(AIRPORTS)
         logger.info(f"🛫 AIRPORTS загружен: {airport_count} записей")
@@ -25,31 +47,17 @@ async def admin_fill_airports_callback(callback: types.CallbackQuery):
         logger.error(f"❌ Ошибка доступа к AIRPORTS: {e}")
         await callback.message.answer(f"❌ Ошибка: {e}")
         return
-    
+
     await callback.answer()
-    
-    success_count = 0
-    error_count = 0
-    
-    for i, (keyword, content) in enumerate(AIRPORTS, 1):
-        try:
-            await add_info(keyword, content)
-            success_count += 1
-            if i % 25 == 0:
-                logger.info(f"✅ Прогресс: {i}/{airport_count}")
-            await asyncio.sleep(0.03)
-        except Exception as e:
-            error_count += 1
-            logger.error(f"❌ Ошибка {keyword}: {e}")
-    
-    logger.info(f"✅ ЗАВЕРШЕНО! Успешно: {success_count}, Ошибок: {error_count}")
-    
-    await callback.message.answer(
-        f"✅ <b>Заполнение завершено!</b>\n\n"
-        f"📊 <b>Статистика:</b>\n"
-        f"✅ Успешно: {success_count}\n"
-        f"❌ Ошибок: {error_count}"
-    )
+
+    try:
+        result, elapsed = await load_airports()
+    except Exception as e:
+        logger.error(f"❌ Ошибка загрузки аэродромов: {e}")
+        await callback.message.answer(f"❌ Ошибка загрузки, база не изменена: {e}")
+        return
+
+    await callback.message.answer(format_load_result(result, elapsed))
 
 @router.message(Command("fill_airports"))
 async def admin_fill_airports_cmd(message: types.Message):
@@ -57,11 +65,10 @@ async def admin_fill_airports_cmd(message: types.Message):
     if not is_admin_check(message.from_user.id):
         return
     await send_and_save(message, "⏳ Заполняю...")
-    count = 0
-    for keyword, content in AIRPORTS:
-        try:
-            await add_info(keyword, content)
-            count += 1
-        except:
-            pass
-    await send_and_save(message, f"✅ Заполнено: {count} аэродромов")
+    try:
+        result, elapsed = await load_airports()
+    except Exception as e:
+        logger.error(f"❌ Ошибка загрузки аэродромов: {e}")
+        await send_and_save(message, f"❌ Ошибка загрузки, база не изменена: {e}")
+        return
+    await send_and_save(message, format_load_result(result, elapsed))
@@ -0,0 +1,170 @@
+import os
+import csv
+import html
+import time
+import asyncio
+import logging
+import tempfile
+from contextlib import aclosing
+from datetime import date
+from aiogram import Router, types
+from aiogram.filters import Command, CommandObject
+from aiogram.types import FSInputFile
+from config import EXPORT_FETCH_SIZE
+from database import iter_users
+from qualifications import QUALIFICATIONS, EXPIRED, WARNING, OK, NO_DATA, EXEMPT, evaluate_user
+from utils import local_today
+from ..common import cleanup_last_bot_message, send_and_save, is_admin_check
+
+# XLSX - по желанию: без openpyxl выгрузка идет в CSV
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+logger = logging.getLogger(__name__)
+router = Router()
+
+# ========== ВЫГРУЗКА ЛИЧНОГО СОСТАВА ==========
+# Строки идут из серверного курсора (database.iter_users) в файл порциями,
+# поэтому память не зависит от численности состава. Запись на диск -
+# в потоке (asyncio.to_thread), чтобы не останавливать остальные апдейты.
+
+PROFILE_COLUMNS = (
+    ('user_id', 'ID'),
+    ('username', 'Username'),
+    ('fio', 'ФИО'),
+    ('rank', 'Звание'),
+    ('qual_rank', 'Классность'),
+)
+
+LEVEL_TEXT = {
+    EXPIRED: 'просрочено',
+    WARNING: 'истекает',
+    OK: 'действует',
+    NO_DATA: 'нет данных',
+    EXEMPT: 'освобожден',
+}
+
+# Начало ячейки, которое Excel/LibreOffice примут за формулу
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Одна выгрузка за раз: каждая держит подключение из пула до конца обхода
+_export_lock = asyncio.Lock()
+
+def export_header():
+    """Заголовок: данные профиля, по каждому сроку дата/статус/дней, допуск"""
+    header = [title for _, title in PROFILE_COLUMNS]
+    for q in QUALIFICATIONS:
+        header += [q.label, f"{q.label}: статус", f"{q.label}: дней"]
+    header.append("Допуск к полетам")
+    return header
+
+def safe_cell(value):
+    """Текст из анкеты не должен исполняться как формула - экранируем апострофом"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def export_row(status):
+    """Строка выгрузки по рассчитанным статусам пользователя"""
+    user = status.user
+    row = [safe_cell(user.get(column)) for column, _ in PROFILE_COLUMNS]
+    for q in QUALIFICATIONS:
+        field = status.fields[q.column]
+        # Для "освобожден" и нераспознанного текста - исходное значение
+        value = field.value if field.value is not None else safe_cell(user.get(q.column))
+        row += [value, LEVEL_TEXT[field.level], field.days_left]
+    row.append("запрет" if status.is_banned else "допущен")
+    return row
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        return value.strftime("%d.%m.%Y")
+    return value
+
+async def export_batches(today, size=EXPORT_FETCH_SIZE):
+    """Строки выгрузки порциями по size"""
+    batch = []
+    # aclosing: при ошибке записи курсор и подключение освобождаются сразу, а не при сборке мусора
+    async with aclosing(iter_users()) as users:
+        async for user in users:
+            batch.append(export_row(evaluate_user(user, today)))
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def _append_rows(sheet, rows):
+    for row in rows:
+        sheet.append(row)
+
+async def write_csv(path, today):
+    """Записать выгрузку в CSV, вернуть число пользователей"""
+    count = 0
+    # utf-8-sig и ";" - чтобы Excel с русской локалью открыл файл как таблицу
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(export_header())
+        async with aclosing(export_batches(today)) as batches:
+            async for batch in batches:
+                rows = [[_csv_value(value) for value in row] for row in batch]
+                await asyncio.to_thread(writer.writerows, rows)
+                count += len(rows)
+    return count
+
+async def write_xlsx(path, today):
+    """Записать выгрузку в XLSX (write_only - строки сразу уходят на диск)"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Личный состав")
+    sheet.append(export_header())
+    count = 0
+    async with aclosing(export_batches(today)) as batches:
+        async for batch in batches:
+            await asyncio.to_thread(_append_rows, sheet, batch)
+            count += len(batch)
+    # Упаковка zip на 100k строк - секунды работы, не на event loop
+    await asyncio.to_thread(workbook.save, path)
+    return count
+
+@router.message(Command("export"))
+async def admin_export_cmd(message: types.Message, command: CommandObject):
+    """Выгрузка списка: /export (CSV) или /export xlsx"""
+    await cleanup_last_bot_message(message)
+    if not is_admin_check(message.from_user.id):
+        return
+
+    fmt = (command.args or "csv").strip().lower()
+    if fmt not in ("csv", "xlsx"):
+        await send_and_save(message, "❌ Формат: /export или /export xlsx")
+        return
+    if fmt == "xlsx" and Workbook is None:
+        await send_and_save(message, "⚠️ openpyxl не установлен - выгружаю в CSV")
+        fmt = "csv"
+
+    if _export_lock.locked():
+        await send_and_save(message, "⏳ Выгрузка уже идет, попробуйте позже")
+        return
+
+    async with _export_lock:
+        today = local_today()
+        fd, path = tempfile.mkstemp(prefix="export_", suffix=f".{fmt}")
+        os.close(fd)
+        started = time.perf_counter()
+        try:
+            write = write_xlsx if fmt == "xlsx" else write_csv
+            count = await write(path, today)
+            logger.info(f"📄 Выгрузка {fmt}: {count} чел. за {time.perf_counter() - started:.2f} с")
+            # Файл не запоминаем как последнее сообщение - его не удалит следующая команда
+            await message.answer_document(
+                FSInputFile(path, filename=f"personnel_{today:%Y-%m-%d}.{fmt}"),
+                caption=f"📄 Личный состав на {today:%d.%m.%Y}: {count} чел.",
+            )
+        except Exception as e:
+            logger.error(f"❌ Ошибка выгрузки: {e}")
+            await send_and_save(message, f"❌ <b>Ошибка выгрузки:</b> {html.escape(str(e))}")
+        finally:
+            os.remove(path)
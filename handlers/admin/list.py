@@ -1,32 +1,74 @@
+import html
 from aiogram import Router, F, types
 from aiogram.filters import Command
-from database import get_all_users
-from utils import get_user_status_with_colors
+from aiogram.exceptions import TelegramBadRequest
+from database import get_users_page
+from keyboards import get_roster_keyboard
+from utils import format_status_summary, local_today
+from qualifications import evaluate_users
+from compliance import compliance_counters
 from ..common import cleanup_last_bot_message, send_and_save, is_admin_check
 
 router = Router()
 
+ROSTER_TITLES = {
+    'all': "📋 <b>Список личного состава</b>",
+    'red': "🔴 <b>Запреты на полеты</b>",
+    'warn': "🟡 <b>Сроки истекают в ближайшие дни</b>",
+}
+
+def format_roster(users, roster_filter='all'):
+    """Текст страницы: статусы считаются одним проходом по странице"""
+    output = ROSTER_TITLES.get(roster_filter, ROSTER_TITLES['all'])
+    if roster_filter == 'all' and compliance_counters.ready:
+        output += f" (всего {compliance_counters.snapshot(local_today())['total']})"
+    output += "\n\n"
+    if not users:
+        return output + "Список пуст."
+    for status in evaluate_users(users, local_today()):
+        u = status.user
+        fio = html.escape(u.get('fio') or 'Нет данных')
+        rank = html.escape(u.get('rank') or '')
+        
+        output += f"👤 {fio} ({rank})\n"
+        output += f"   {format_status_summary(status)}\n\n"
+    return output
+
+async def render_roster_page(roster_filter='all', direction='first', cursor=None):
+    """Загрузить страницу и вернуть (текст, клавиатура)"""
+    page = await get_users_page(local_today(), roster_filter, direction, cursor)
+    if not page['users'] and direction != 'first':
+        # Курсор мог исчезнуть (пользователя удалили) - начинаем сначала
+        page = await get_users_page(local_today(), roster_filter)
+    return format_roster(page['users'], roster_filter), get_roster_keyboard(roster_filter, page)
+
 @router.callback_query(F.data == "admin_list")
 async def admin_list_callback(callback: types.CallbackQuery):
     if not is_admin_check(callback.from_user.id):
         return
     
-    users = await get_all_users()
-    if not users:
-        await callback.message.answer("📋 Список пуст.")
-        await callback.answer()
+    text, kb = await render_roster_page()
+    await callback.message.answer(text, reply_markup=kb)
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("roster:"))
+async def admin_roster_page_callback(callback: types.CallbackQuery):
+    if not is_admin_check(callback.from_user.id):
         return
     
-    output = "📋 <b>Список личного состава:</b>\n\n"
-    for i, u in enumerate(users, 1):
-        fio = u.get('fio', 'Нет данных')
-        rank = u.get('rank', '')
-        status = get_user_status_with_colors(u)
-        
-        output += f"{i}. 👤 {fio} ({rank})\n"
-        output += f"   {status}\n\n"
+    try:
+        _, roster_filter, direction, cursor = callback.data.split(":")
+        cursor = int(cursor) if direction != 'first' else None
+    except ValueError:
+        await callback.answer()
+        return
     
-    await callback.message.answer(output[:4000])
+    text, kb = await render_roster_page(roster_filter, direction, cursor)
+    try:
+        await callback.message.edit_text(text, reply_markup=kb)
+    except TelegramBadRequest:
+        # "message is not modified" при повторном нажатии - не ошибка
+        pass
     await callback.answer()
 
 @router.message(Command("list"))
@@ -35,18 +77,5 @@ async def admin_list_cmd(message: types.Message):
     if not is_admin_check(message.from_user.id):
         return
     
-    users = await get_all_users()
-    if not users:
-        await send_and_save(message, "📋 Список пуст.")
-        return
-    
-    output = "📋 <b>Список личного состава:</b>\n\n"
-    for i, u in enumerate(users, 1):
-        fio = u.get('fio', 'Нет данных')
-        rank = u.get('rank', '')
-        status = get_user_status_with_colors(u)
-        
-        output += f"{i}. 👤 {fio} ({rank})\n"
-        output += f"   {status}\n\n"
-    
-    await send_and_save(message, output[:4000])
+    text, kb = await render_roster_page()
+    await send_and_save(message, text, reply_markup=kb)
@@ -1,21 +1,38 @@
 from aiogram import Router, F, types
-from database import get_all_users
-from utils import check_flight_ban
+from database import iter_users
+from compliance import compliance_counters, READY, ATTENTION, BANNED
+from qualifications import EXPIRING_QUALIFICATIONS, EXPIRED, WARNING
+from utils import local_today
 from ..common import is_admin_check  # ✅ ..common
 
 router = Router()
 
+def format_stats(snapshot):
+    """Текст статистики по снимку счетчиков"""
+    statuses = snapshot['statuses']
+    text = (
+        f"📊 <b>Статистика:</b>\n\n"
+        f"👥 Всего: {snapshot['total']}\n"
+        f"✅ Готовы: {statuses[READY] + statuses[ATTENTION]}\n"
+        f"🟡 Требуют внимания: {statuses[ATTENTION]}\n"
+        f"🚫 Запреты: {statuses[BANNED]}"
+    )
+    lines = []
+    for q in EXPIRING_QUALIFICATIONS:
+        counts = snapshot['fields'][q.column]
+        if counts[EXPIRED] or counts[WARNING]:
+            lines.append(f"{q.short}: 🔴 {counts[EXPIRED]} · 🟡 {counts[WARNING]}")
+    if lines:
+        text += "\n\n<b>По срокам:</b>\n" + "\n".join(lines)
+    return text
+
 @router.callback_query(F.data == "admin_stats")
 async def admin_stats_callback(callback: types.CallbackQuery):
     if not is_admin_check(callback.from_user.id):
         return
-    users = await get_all_users()
-    total = len(users)
-    banned = sum(1 for u in users if check_flight_ban(u))
-    await callback.message.answer(
-        f"📊 <b>Статистика:</b>\n\n"
-        f"👥 Всего: {total}\n"
-        f"✅ Готовы: {total - banned}\n"
-        f"🚫 Запреты: {banned}"
-    )
+    if not compliance_counters.ready:
+        # Счетчики не построены при старте - строим сейчас (один полный проход)
+        await compliance_counters.load(iter_users(), local_today())
+    snapshot = compliance_counters.snapshot(local_today())
+    await callback.message.answer(format_stats(snapshot))
     await callback.answer()
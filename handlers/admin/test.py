@@ -1,9 +1,11 @@
+import html
 import logging
 from aiogram import Router, types
 from aiogram.filters import Command
 from airports_data import AIRPORTS
-from database import get_all_users
-from ..common import cleanup_last_bot_message, send_and_save
+from database import get_all_users, get_query_stats, get_pool_stats
+from utils import split_message
+from ..common import cleanup_last_bot_message, send_and_save, is_admin_check
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -44,3 +46,36 @@ async def test_db(message: types.Message):
     except Exception as e:
         await send_and_save(message, f"❌ <b>Ошибка БД:</b> {e}")
         logger.error(f"❌ Ошибка теста БД: {e}")
+
+def format_db_stats(query_stats, pool_stats, limit=5):
+    """Строки отчета /db_stats: пул, самые тяжелые запросы, последний план"""
+    lines = [
+        "🗄 <b>Статистика БД</b>",
+        f"Пул: {pool_stats['in_use']}/{pool_stats['size']} занято, ожидают {pool_stats['waiters']}, "
+        f"ожидание ср. {pool_stats['acquire_avg_ms']:.1f} мс, макс. {pool_stats['acquire_max_ms']:.1f} мс",
+        "",
+        "<b>Самые тяжелые запросы:</b>",
+    ]
+    for item in query_stats['top'][:limit]:
+        lines.append(
+            f"• {item['calls']} выз., ср. {item['avg_ms']:.1f} мс, макс. {item['max_ms']:.1f} мс, "
+            f"строк {item['rows']}, медленных {item['slow']}\n"
+            f"<code>{html.escape(item['sql'][:300])}</code>"
+        )
+    if not query_stats['top']:
+        lines.append("Запросов еще не было")
+    if query_stats['plans']:
+        last = query_stats['plans'][-1]
+        lines.append("")
+        lines.append(f"🔎 <b>Последний план</b> ({last['elapsed_ms']:.0f} мс):")
+        lines.append(f"<pre>{html.escape(last['plan'][:1500])}</pre>")
+    return lines
+
+@router.message(Command("db_stats"))
+async def db_stats(message: types.Message):
+    """Статистика запросов к БД и выборочные планы медленных запросов"""
+    await cleanup_last_bot_message(message)
+    if not is_admin_check(message.from_user.id):
+        return
+    for part in split_message(format_db_stats(get_query_stats(), get_pool_stats())):
+        await send_and_save(message, part)
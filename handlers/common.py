@@ -2,10 +2,13 @@ import logging
 from aiogram import types
 
 logger = logging.getLogger(__name__)
-from config import ADMIN_ID
+from roles import admin_registry
+from keyboards import get_main_menu
+from message_store import LastMessageStore
+from message_cleanup import message_cleaner
 
-# Хранение последних сообщений бота
-last_bot_messages = {}
+# Хранение последних сообщений бота (ограничено по размеру и времени жизни)
+last_bot_messages = LastMessageStore()
 
 async def delete_message_safe(message: types.Message):
     """Безопасное удаление сообщения"""
@@ -15,23 +18,25 @@ async def delete_message_safe(message: types.Message):
         logger.debug(f"Не удалось удалить сообщение: {e}")
 
 async def cleanup_last_bot_message(message: types.Message):
-    """Удаляет последнее сообщение бота в чате"""
+    """
+    Удаляет последнее сообщение бота в чате.
+    Удаление уходит в фоновую очередь и не задерживает ответ.
+    """
     chat_id = message.chat.id
-    if chat_id in last_bot_messages:
-        try:
-            await message.bot.delete_message(chat_id, last_bot_messages[chat_id])
-        except Exception as e:
-            logger.debug(f"Не удалось удалить старое сообщение: {e}")
-        finally:
-            if chat_id in last_bot_messages:
-                del last_bot_messages[chat_id]
+    message_id = last_bot_messages.pop(chat_id)
+    if message_id is not None:
+        message_cleaner.schedule(message.bot, chat_id, message_id)
 
 async def send_and_save(message: types.Message, text: str, **kwargs):
     """Отправляет сообщение и сохраняет его ID"""
     sent_message = await message.answer(text, **kwargs)
-    last_bot_messages[message.chat.id] = sent_message.message_id
+    last_bot_messages.set(message.chat.id, sent_message.message_id)
     return sent_message
 
 def is_admin_check(user_id):
-    """Проверяет является ли пользователь админом"""
-    return user_id == ADMIN_ID
+    """Проверяет является ли пользователь админом (O(1), без запроса к БД)"""
+    return admin_registry.is_admin(user_id)
+
+def get_persistent_menu(is_admin=False):
+    """Постоянное меню под полем ввода (то же главное меню)"""
+    return get_main_menu(is_admin=is_admin)
@@ -1,10 +1,11 @@
 from aiogram import Router, F, types
 from aiogram.fsm.context import FSMContext
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from database import get_user, update_user_field
+from database import get_user, update_user_field, update_user_fields
 from states import EditProfile
 from keyboards import get_edit_menu, FIELD_MAP, FIELD_NAMES
-from utils import generate_profile_text, check_flight_ban
+from utils import generate_profile_text, check_flight_ban, local_today
+from qualifications import evaluate_user
 
 router = Router()
 
@@ -14,8 +15,9 @@ async def show_profile(message: types.Message):
     if not user or not user.get('registered'):
         await message.answer("Сначала пройдите регистрацию (/start)")
         return
-    text = generate_profile_text(user)
-    bans = check_flight_ban(user)
+    status = evaluate_user(user, local_today())
+    text = generate_profile_text(user, status)
+    bans = check_flight_ban(user, status)
     if bans:
         text += "\n\n🚫 <b>ПОЛЕТЫ ЗАПРЕЩЕНЫ!</b>\n" + "\n".join(bans)
     kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="✏️ Редактировать", callback_data="edit_start")]])
@@ -57,16 +59,24 @@ async def save_edit(message: types.Message, state: FSMContext):
         await message.answer("❌ Ошибка")
         await state.clear()
         return
-    if field_key == "vacation":
-        parts = message.text.split('-')
-        if len(parts) == 2:
-            await update_user_field(message.from_user.id, 'vacation_start', parts[0].strip())
-            await update_user_field(message.from_user.id, 'vacation_end', parts[1].strip())
-            await message.answer("✅ Обновлено!")
-    else:
-        db_field = FIELD_MAP.get(field_key)
-        if db_field:
-            await update_user_field(message.from_user.id, db_field, message.text)
-            await message.answer("✅ Обновлено!")
+    try:
+        if field_key == "vacation":
+            parts = message.text.split('-')
+            if len(parts) == 2:
+                await update_user_fields(
+                    message.from_user.id,
+                    vacation_start=parts[0].strip(),
+                    vacation_end=parts[1].strip()
+                )
+                await message.answer("✅ Обновлено!")
+        else:
+            db_field = FIELD_MAP.get(field_key)
+            if db_field:
+                await update_user_field(message.from_user.id, db_field, message.text)
+                await message.answer("✅ Обновлено!")
+    except ValueError:
+        # Состояние не сбрасываем - следующий ответ снова попадет сюда
+        await message.answer("❌ Неверная дата! Введите в формате ДД.ММ.ГГГГ:")
+        return
     await state.clear()
     await show_profile(message)
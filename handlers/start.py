@@ -2,18 +2,31 @@ from aiogram import Router, F, types
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 from states import Registration
-from database import add_user, update_user_field, set_registered, get_user
+from database import add_user, register_user
+from qualifications import convert_field_value
 from utils import check_flight_ban, generate_profile_text
 from keyboards import get_main_menu
 from .common import cleanup_last_bot_message, send_and_save, is_admin_check
 
 router = Router()
 
+async def reject_invalid_date(message, field, value):
+    """
+    Проверить дату из ответа анкеты. При ошибке переспрашиваем:
+    состояние не меняется, следующий ответ попадет в тот же шаг.
+    """
+    try:
+        convert_field_value(field, value)
+    except ValueError:
+        await send_and_save(message, "❌ Неверная дата! Введите в формате ДД.ММ.ГГГГ:")
+        return True
+    return False
+
 @router.message(CommandStart())
 async def cmd_start(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
-    await add_user(message.from_user.id, message.from_user.username)
-    user = await get_user(message.from_user.id)
+    # add_user возвращает строку пользователя - отдельный get_user не нужен
+    user = await add_user(message.from_user.id, message.from_user.username)
     admin = is_admin_check(message.from_user.id)
     
     if user and user.get('registered'):
@@ -34,21 +47,21 @@ async def cmd_start(message: types.Message, state: FSMContext):
 @router.message(Registration.fio)
 async def reg_fio(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
-    await update_user_field(message.from_user.id, 'fio', message.text)
+    await state.update_data(fio=message.text)
     await state.set_state(Registration.rank)
     await send_and_save(message, "2️⃣ Введите воинское звание:")
 
 @router.message(Registration.rank)
 async def reg_rank(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
-    await update_user_field(message.from_user.id, 'rank', message.text)
+    await state.update_data(rank=message.text)
     await state.set_state(Registration.qual_rank)
     await send_and_save(message, "3️⃣ Введите квалификационный разряд:")
 
 @router.message(Registration.qual_rank)
 async def reg_qual(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
-    await update_user_field(message.from_user.id, 'qual_rank', message.text)
+    await state.update_data(qual_rank=message.text)
     await state.set_state(Registration.vacation)
     await send_and_save(message, "4️⃣ Введите даты крайнего отпуска (формат: ДД.ММ.ГГГГ - ДД.ММ.ГГГГ):")
 
@@ -63,8 +76,10 @@ async def reg_vacation(message: types.Message, state: FSMContext):
         if len(parts) != 2:
             await send_and_save(message, "❌ Ошибка формата! Введите две даты через дефис")
             return
-        await update_user_field(message.from_user.id, 'vacation_start', parts[0].strip())
-        await update_user_field(message.from_user.id, 'vacation_end', parts[1].strip())
+        if (await reject_invalid_date(message, 'vacation_start', parts[0])
+                or await reject_invalid_date(message, 'vacation_end', parts[1])):
+            return
+        await state.update_data(vacation_start=parts[0].strip(), vacation_end=parts[1].strip())
         await state.set_state(Registration.vlk)
         await send_and_save(message, "5️⃣ Введите дату прохождения ВЛК (ДД.ММ.ГГГГ):")
     except Exception as e:
@@ -73,7 +88,9 @@ async def reg_vacation(message: types.Message, state: FSMContext):
 @router.message(Registration.vlk)
 async def reg_vlk(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
-    await update_user_field(message.from_user.id, 'vlk_date', message.text)
+    if await reject_invalid_date(message, 'vlk_date', message.text):
+        return
+    await state.update_data(vlk_date=message.text)
     await state.set_state(Registration.umo)
     await send_and_save(message, "6️⃣ Введите дату прохождения УМО (ДД.ММ.ГГГГ). Если не было - напишите 'нет':")
 
@@ -81,45 +98,64 @@ async def reg_vlk(message: types.Message, state: FSMContext):
 async def reg_umo(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
     val = message.text if message.text.lower() != 'нет' else None
-    await update_user_field(message.from_user.id, 'umo_date', val)
+    if await reject_invalid_date(message, 'umo_date', val):
+        return
+    await state.update_data(umo_date=val)
     await state.set_state(Registration.kbp_4_md_m)
     await send_and_save(message, "7️⃣ КБП-4 Ил-76 МД-М (ДД.ММ.ГГГГ):")
 
 @router.message(Registration.kbp_4_md_m)
 async def reg_kbp4m(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
-    await update_user_field(message.from_user.id, 'kbp_4_md_m', message.text)
+    if await reject_invalid_date(message, 'kbp_4_md_m', message.text):
+        return
+    await state.update_data(kbp_4_md_m=message.text)
     await state.set_state(Registration.kbp_7_md_m)
     await send_and_save(message, "8️⃣ КБП-7 Ил-76 МД-М (ДД.ММ.ГГГГ):")
 
 @router.message(Registration.kbp_7_md_m)
 async def reg_kbp7m(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
-    await update_user_field(message.from_user.id, 'kbp_7_md_m', message.text)
+    if await reject_invalid_date(message, 'kbp_7_md_m', message.text):
+        return
+    await state.update_data(kbp_7_md_m=message.text)
     await state.set_state(Registration.kbp_4_md_90a)
     await send_and_save(message, "9️⃣ КБП-4 Ил-76 МД-90А (ДД.ММ.ГГГГ):")
 
 @router.message(Registration.kbp_4_md_90a)
 async def reg_kbp4_90(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
-    await update_user_field(message.from_user.id, 'kbp_4_md_90a', message.text)
+    if await reject_invalid_date(message, 'kbp_4_md_90a', message.text):
+        return
+    await state.update_data(kbp_4_md_90a=message.text)
     await state.set_state(Registration.kbp_7_md_90a)
     await send_and_save(message, "🔟 КБП-7 Ил-76 МД-90А (ДД.ММ.ГГГГ):")
 
 @router.message(Registration.kbp_7_md_90a)
 async def reg_kbp7_90(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
-    await update_user_field(message.from_user.id, 'kbp_7_md_90a', message.text)
+    if await reject_invalid_date(message, 'kbp_7_md_90a', message.text):
+        return
+    await state.update_data(kbp_7_md_90a=message.text)
     await state.set_state(Registration.jumps)
     await send_and_save(message, "1️⃣1️⃣ Дата выполнения прыжков с парашютом (ДД.ММ.ГГГГ):")
 
 @router.message(Registration.jumps)
 async def reg_finish(message: types.Message, state: FSMContext):
     await cleanup_last_bot_message(message)
-    await update_user_field(message.from_user.id, 'jumps_date', message.text)
-    await set_registered(message.from_user.id)
+    # Все ответы копились в FSM - записываем анкету одним запросом
+    if await reject_invalid_date(message, 'jumps_date', message.text):
+        return
+    data = await state.get_data()
+    data['jumps_date'] = message.text
+    try:
+        user = await register_user(message.from_user.id, message.from_user.username, data)
+    except ValueError:
+        # Анкета из старой сессии, где даты еще не проверялись по шагам
+        await state.clear()
+        await send_and_save(message, "❌ В анкете некорректная дата. Пройдите регистрацию заново: /start")
+        return
     await state.clear()
-    user = await get_user(message.from_user.id)
     bans = check_flight_ban(user)
     admin = is_admin_check(message.from_user.id)
     if bans:
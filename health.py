@@ -0,0 +1,144 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from config import (
+    LOOP_LAG_INTERVAL, LOOP_LAG_WINDOW, READY_MAX_LOOP_LAG, READY_MAX_POLL_AGE,
+    DB_PING_TTL, DB_PING_TIMEOUT
+)
+from metrics import EVENT_LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+# ========== ЖИВОСТЬ И ГОТОВНОСТЬ ==========
+# /health - процесс жив (web-сервер отвечает), перезапуск только если нет.
+# /ready  - экземпляр может обслуживать пользователей: event loop не
+# застрял, обновления приходят, база отвечает.
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+class LoopLagMonitor:
+    """
+    Фоновая задача: засыпает на interval и меряет, насколько позже
+    запланированного проснулась. Задержка = время, когда loop был занят.
+    """
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL, window=LOOP_LAG_WINDOW):
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self):
+        """Перцентили задержки за последние window замеров (мс)"""
+        values = sorted(self.samples)
+        return {
+            'samples': len(values),
+            'p50_ms': round(_percentile(values, 50) * 1000, 1),
+            'p95_ms': round(_percentile(values, 95) * 1000, 1),
+            'p99_ms': round(_percentile(values, 99) * 1000, 1),
+            'max_ms': round(values[-1] * 1000, 1) if values else 0.0,
+        }
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - expected, 0.0)
+            self.samples.append(lag)
+            EVENT_LOOP_LAG.observe(lag)
+
+class Readiness:
+    """
+    Состояние для /ready. mode и ping задаются в main.py:
+    mode - 'polling' или 'webhook', ping - корутина проверки БД.
+    """
+
+    def __init__(self, lag_monitor, max_loop_lag=READY_MAX_LOOP_LAG, max_poll_age=READY_MAX_POLL_AGE,
+                 db_ttl=DB_PING_TTL, db_timeout=DB_PING_TIMEOUT):
+        self.lag_monitor = lag_monitor
+        self.max_loop_lag = max_loop_lag
+        self.max_poll_age = max_poll_age
+        self.db_ttl = db_ttl
+        self.db_timeout = db_timeout
+        self.mode = None
+        self.ping = None
+        self.last_update_at = None
+        self.last_poll_at = None
+        self._db = None
+        self._db_checked_at = None
+        self._db_lock = asyncio.Lock()
+
+    def mark_update(self):
+        """Пришло обновление (из polling или webhook)"""
+        self.last_update_at = time.monotonic()
+
+    def mark_poll(self):
+        """getUpdates завершился успешно (даже если обновлений не было)"""
+        self.last_poll_at = time.monotonic()
+
+    def update_age(self):
+        return self._age(self.last_update_at)
+
+    async def check_db(self):
+        """Результат проверки БД, не чаще раза в db_ttl секунд"""
+        async with self._db_lock:
+            now = time.monotonic()
+            if self._db is None or now - self._db_checked_at >= self.db_ttl:
+                self._db = await self._ping_db()
+                self._db_checked_at = time.monotonic()
+            return dict(self._db, checked_age_s=round(time.monotonic() - self._db_checked_at, 1))
+
+    async def report(self):
+        """
+        Returns:
+            tuple: (готов ли экземпляр, dict с подробностями для ответа)
+        """
+        loop = self.lag_monitor.stats()
+        loop['ok'] = loop['p99_ms'] <= self.max_loop_lag * 1000
+
+        poll_age = self._age(self.last_poll_at)
+        updates = {'last_update_age_s': self.update_age(), 'last_poll_age_s': poll_age}
+        if self.mode == 'polling':
+            updates['ok'] = poll_age is not None and poll_age <= self.max_poll_age
+        else:
+            # В webhook-режиме тишина - не ошибка: обновлений может просто не быть
+            updates['ok'] = self.mode == 'webhook'
+
+        db = await self.check_db()
+        ready = loop['ok'] and updates['ok'] and db['ok']
+        return ready, {
+            'status': 'ready' if ready else 'not_ready',
+            'mode': self.mode,
+            'checks': {'loop': loop, 'updates': updates, 'db': db},
+        }
+
+    async def _ping_db(self):
+        if self.ping is None:
+            return {'ok': False, 'error': 'not configured'}
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.ping(), timeout=self.db_timeout)
+        except Exception as e:
+            logger.warning(f"⚠️ Проверка БД не прошла: {e!r}")
+            return {'ok': False, 'error': repr(e)}
+        return {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+    @staticmethod
+    def _age(moment):
+        return round(time.monotonic() - moment, 1) if moment is not None else None
+
+lag_monitor = LoopLagMonitor()
+readiness = Readiness(lag_monitor)
@@ -62,6 +62,29 @@ def get_confirm_remove_admin_keyboard(user_id):
     ]
     return InlineKeyboardMarkup(inline_keyboard=kb)
 
+def get_roster_keyboard(roster_filter, page):
+    """
+    Навигация по списку личного состава.
+    callback_data: roster:<фильтр>:<направление>:<user_id курсора>
+    """
+    users = page['users']
+    nav = []
+    if page['has_prev'] and users:
+        nav.append(InlineKeyboardButton(text="◀️", callback_data=f"roster:{roster_filter}:prev:{users[0]['user_id']}"))
+    if page['has_next'] and users:
+        nav.append(InlineKeyboardButton(text="▶️", callback_data=f"roster:{roster_filter}:next:{users[-1]['user_id']}"))
+    
+    filters = [("all", "Все"), ("red", "🔴 Запреты"), ("warn", "🟡 Скоро")]
+    kb = [nav] if nav else []
+    kb.append([
+        InlineKeyboardButton(
+            text=f"• {title}" if key == roster_filter else title,
+            callback_data=f"roster:{key}:first:0"
+        )
+        for key, title in filters
+    ])
+    return InlineKeyboardMarkup(inline_keyboard=kb)
+
 # Маппинг полей
 FIELD_MAP = {
     "fio": "fio",
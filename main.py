@@ -1,12 +1,22 @@
 import os
+import signal
 import asyncio
 import logging
 from aiohttp import web
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from config import BOT_TOKEN
-from database import init_db
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from config import BOT_TOKEN, WEBHOOK_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET
+from database import init_db, init_pool, close_pool, iter_users, load_admins, get_pool_stats, get_user_cache_stats, ping
+from compliance import compliance_counters
+from fsm_storage import PostgresStorage
+from handlers.common import last_bot_messages
+from message_cleanup import message_cleaner
+from middlewares import setup_middlewares
+from health import lag_monitor, readiness
+import metrics
+from utils import local_today
 from handlers import router
 from scheduler import start_scheduler
 
@@ -14,13 +24,60 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 async def health_check(request):
+    # Liveness: отвечает, пока жив процесс; зависимости не проверяем,
+    # чтобы сбой БД не приводил к перезапуску контейнера
     return web.json_response({'status': 'ok', 'service': 'telegram-bot'})
 
-async def start_web_server():
+async def ready_check(request):
+    # Readiness: loop не застрял, обновления приходят, БД отвечает
+    ready, report = await readiness.report()
+    return web.json_response(report, status=200 if ready else 503)
+
+async def metrics_handler(request):
+    return web.Response(text=metrics.render(), headers={'Content-Type': metrics.CONTENT_TYPE})
+
+def register_runtime_metrics(storage):
+    """Метрики состояния процесса - считаются только при опросе /metrics"""
+    pool_states = ('size', 'in_use', 'idle', 'max_size', 'waiters')
+    metrics.gauge(
+        "db_pool_connections", "Подключения пула БД по состояниям",
+        lambda: [((state,), value) for state, value in get_pool_stats().items() if state in pool_states],
+        labels=("state",),
+    )
+    caches = {'users': get_user_cache_stats, 'last_messages': last_bot_messages.stats}
+    for name in ('hits', 'misses', 'evictions'):
+        metrics.gauge(
+            f"bot_cache_{name}_total", f"Кэши в памяти: {name}",
+            lambda name=name: [((cache,), stats()[name]) for cache, stats in caches.items()],
+            labels=("cache",), kind="counter",
+        )
+    metrics.gauge(
+        "bot_cache_size", "Записей в кэше",
+        lambda: [((cache,), stats()['size']) for cache, stats in caches.items()],
+        labels=("cache",),
+    )
+    metrics.gauge("bot_fsm_states", "Активных FSM-состояний в памяти", lambda: len(storage))
+    metrics.gauge(
+        "bot_last_update_age_seconds", "Секунд с последнего обновления",
+        lambda: readiness.update_age() or 0.0,
+    )
+
+def create_web_app(dp=None, bot=None):
+    """aiohttp-приложение: health check и, если передан dp, прием webhook"""
     app = web.Application()
     app.router.add_get('/', health_check)
     app.router.add_get('/health', health_check)
+    app.router.add_get('/ready', ready_check)
+    app.router.add_get('/metrics', metrics_handler)
     
+    if dp is not None:
+        # Telegram присылает секрет в заголовке, чужие запросы получают 401
+        SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+        # startup/shutdown диспетчера привязываем к жизненному циклу приложения
+        setup_application(app, dp, bot=bot)
+    return app
+
+async def start_web_server(app):
     runner = web.AppRunner(app)
     await runner.setup()
     
@@ -29,37 +86,91 @@ async def start_web_server():
     await site.start()
     
     logger.info(f"✅ Web-сервер запущен на порту {port}")
+    return runner
+
+async def setup_webhook(bot, dp):
+    """Зарегистрировать webhook в Telegram, вернуть False при ошибке"""
+    try:
+        await bot.set_webhook(
+            WEBHOOK_URL,
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=True,
+        )
+    except Exception as e:
+        logger.error(f"❌ Не удалось установить webhook: {e}")
+        return False
+    logger.info(f"✅ Webhook установлен: {WEBHOOK_URL}")
+    return True
 
 async def main():
     logger.info("🚀 Запуск бота...")
+    lag_monitor.start()
     
     bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    dp = Dispatcher()
+    storage = PostgresStorage()
+    dp = Dispatcher(storage=storage)
     
     dp.include_router(router)
+    setup_middlewares(dp, bot)
+    register_runtime_metrics(storage)
+    # Дочищаем очередь удаления до закрытия сессии бота
+    dp.shutdown.register(message_cleaner.close)
     
     logger.info("📊 Инициализация базы данных...")
+    await init_pool()
     await init_db()
+    await compliance_counters.load(iter_users(), local_today())
+    await load_admins()
+    storage.start()
+    await last_bot_messages.load()
     logger.info("✅ База данных готова")
     
-    logger.info("🔄 Удаляем webhook...")
-    await bot.delete_webhook(drop_pending_updates=True)
-    logger.info("✅ Webhook удален")
+    readiness.ping = ping
+    use_webhook = False
+    if WEBHOOK_MODE and not WEBHOOK_URL:
+        logger.warning("⚠️ WEBHOOK_MODE включен, но адрес не задан - работаем через polling")
+    elif WEBHOOK_MODE:
+        # Пока сервер не поднят, Telegram повторит доставку - обновления не потеряются
+        use_webhook = await setup_webhook(bot, dp)
+    
+    readiness.mode = 'webhook' if use_webhook else 'polling'
     
     logger.info("🌐 Запуск веб-сервера...")
-    await start_web_server()
+    runner = await start_web_server(create_web_app(dp, bot) if use_webhook else create_web_app())
     
     logger.info("⏰ Запуск планировщика...")
     start_scheduler(bot)
     logger.info("✅ Планировщик запущен")
     
-    logger.info("🤖 Запуск опроса бота...")
     try:
-        await dp.start_polling(bot)
+        if use_webhook:
+            logger.info("🤖 Бот работает через webhook")
+            # Обновления приходят в aiohttp, здесь держим процесс до сигнала.
+            # start_polling ставит обработчики SIGTERM/SIGINT сам, здесь - мы:
+            # иначе при деплое процесс завершится без finally и потеряет
+            # отложенную запись FSM и очередь удаления сообщений
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, stop.set)
+            await stop.wait()
+            logger.info("🛑 Получен сигнал остановки")
+        else:
+            logger.info("🔄 Удаляем webhook...")
+            await bot.delete_webhook(drop_pending_updates=True)
+            logger.info("✅ Webhook удален")
+            
+            logger.info("🤖 Запуск опроса бота...")
+            await dp.start_polling(bot)
     except Exception as e:
-        logger.error(f"❌ Ошибка polling: {e}")
+        logger.error(f"❌ Ошибка получения обновлений: {e}")
     finally:
+        # В режиме webhook здесь же срабатывает shutdown диспетчера
+        await runner.cleanup()
+        await lag_monitor.stop()
         await bot.session.close()
+        await close_pool()
         logger.info("🛑 Бот остановлен")
 
 if __name__ == "__main__":
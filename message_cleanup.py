@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from config import CLEANUP_BATCH_DELAY
+
+logger = logging.getLogger(__name__)
+
+# Bot API deleteMessages принимает не больше 100 ID за раз
+DELETE_MESSAGES_LIMIT = 100
+
+class MessageCleaner:
+    """
+    Фоновое удаление старых сообщений бота.
+    
+    Хендлер только ставит сообщение в очередь и сразу отвечает
+    пользователю. Воркер раз в CLEANUP_BATCH_DELAY секунд собирает
+    накопившиеся ID по чатам и удаляет их пачками через deleteMessages.
+    Ошибки удаления (сообщение уже удалено, старше 48 часов) игнорируются.
+    """
+
+    def __init__(self, delay=CLEANUP_BATCH_DELAY):
+        self.delay = delay
+        self._pending = {}   # (bot, chat_id) -> [message_id, ...]
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.deleted = 0
+        self.failed = 0
+
+    def __len__(self):
+        return sum(len(ids) for ids in self._pending.values())
+
+    def schedule(self, bot, chat_id, message_id):
+        """Поставить сообщение в очередь на удаление"""
+        self._pending.setdefault((bot, chat_id), []).append(message_id)
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._worker())
+
+    async def flush(self):
+        """Удалить все, что накопилось"""
+        pending, self._pending = self._pending, {}
+        for (bot, chat_id), message_ids in pending.items():
+            for i in range(0, len(message_ids), DELETE_MESSAGES_LIMIT):
+                batch = message_ids[i:i + DELETE_MESSAGES_LIMIT]
+                try:
+                    await bot.delete_messages(chat_id, batch)
+                    self.deleted += len(batch)
+                except Exception as e:
+                    self.failed += len(batch)
+                    logger.debug(f"Не удалось удалить сообщения в {chat_id}: {e}")
+
+    async def close(self):
+        """Остановить воркер и дочистить очередь (при остановке бота)"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def _worker(self):
+        while True:
+            await self._wakeup.wait()
+            # Небольшая пауза, чтобы собрать удаления в пачку
+            await asyncio.sleep(self.delay)
+            self._wakeup.clear()
+            await self.flush()
+
+message_cleaner = MessageCleaner()
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from cache import TTLCache, MISSING
+from database import save_last_message, load_last_messages
+from config import LAST_MESSAGES_MAX, LAST_MESSAGES_TTL, LAST_MESSAGES_PERSIST
+
+logger = logging.getLogger(__name__)
+
+class LastMessageStore:
+    """
+    Последнее сообщение бота в каждом чате (chat_id -> message_id).
+    
+    Размер ограничен (LRU), записи живут LAST_MESSAGES_TTL - Telegram все
+    равно не дает удалить сообщения старше 48 часов. При persist=True
+    записи дублируются в таблицу last_bot_messages в фоне и поднимаются
+    из нее при старте, чтобы старые меню удалялись и после перезапуска.
+    
+    В БД пишется только upsert из set(): pop() строку не удаляет. Иначе
+    фоновый DELETE из pop() и UPSERT из следующего set() шли бы на разных
+    подключениях без порядка, и DELETE мог стереть только что сохраненное.
+    Устаревшую строку перезапишет следующий set(), а load() берет только
+    записи моложе TTL.
+    """
+
+    def __init__(self, maxsize=LAST_MESSAGES_MAX, ttl=LAST_MESSAGES_TTL, persist=LAST_MESSAGES_PERSIST):
+        self._cache = TTLCache(maxsize, ttl)
+        self.persist = persist
+        self._tasks = set()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, chat_id):
+        message_id = self._cache.get(chat_id)
+        return None if message_id is MISSING else message_id
+
+    def set(self, chat_id, message_id):
+        self._cache.set(chat_id, message_id)
+        if self.persist:
+            self._background(save_last_message(chat_id, message_id))
+
+    def pop(self, chat_id):
+        return self._cache.pop(chat_id)
+
+    async def load(self):
+        """Поднять записи из БД (при старте, если persist включен)"""
+        if not self.persist:
+            return
+        rows = await load_last_messages(self._cache.ttl, self._cache.maxsize)
+        for chat_id, message_id in rows:
+            self._cache.set(chat_id, message_id)
+        logger.info(f"💬 Загружено последних сообщений: {len(rows)}")
+
+    def stats(self):
+        return self._cache.stats()
+
+    def _background(self, coro):
+        # Запись в БД не задерживает ответ пользователю
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Не удалось сохранить последнее сообщение: {task.exception()}")
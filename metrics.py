@@ -0,0 +1,210 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Метрики в текстовом формате Prometheus без сторонних зависимостей.
+# На горячем пути - только увеличение числа в словаре; текст собирается
+# и значения "по запросу" (пул, кэши, FSM) вычисляются лишь при опросе /metrics.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы корзин гистограмм по умолчанию (секунды)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Монотонно растущий счетчик"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def collect(self):
+        for label_values, value in list(self._values.items()):
+            yield f"{self.name}{_labels(self.labels, label_values)} {_number(value)}"
+
+class Histogram:
+    """Распределение значений по корзинам (задержки в секундах)"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # метки -> [счетчики корзин (+Inf последней), сумма]
+
+    def observe(self, value, *label_values):
+        series = self._values.get(label_values)
+        if series is None:
+            series = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, *label_values):
+        """Замерить длительность блока"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def count(self, *label_values):
+        series = self._values.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def collect(self):
+        bounds = self.buckets + (float("inf"),)
+        for label_values, (counts, total) in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labels, label_values, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}"
+
+class CallbackMetric:
+    """
+    Значение, которое вычисляется только при опросе.
+    func возвращает число или список пар (значения меток, число).
+    """
+
+    def __init__(self, name, documentation, func, labels=(), kind="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.kind = kind
+        self._func = func
+
+    def collect(self):
+        result = self._func()
+        if not self.labels:
+            result = [((), result)]
+        for label_values, value in result:
+            yield f"{self.name}{_labels(self.labels, label_values)} {_number(value)}"
+
+class Registry:
+    """Набор метрик процесса"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name):
+        self._metrics.pop(name, None)
+
+    def render(self):
+        """Текст для /metrics"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def counter(name, documentation, labels=()):
+    return REGISTRY.register(Counter(name, documentation, labels))
+
+def histogram(name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labels, buckets))
+
+def gauge(name, documentation, func, labels=(), kind="gauge"):
+    return REGISTRY.register(CallbackMetric(name, documentation, func, labels, kind))
+
+def render():
+    return REGISTRY.render()
+
+# ========== МЕТРИКИ БОТА ==========
+
+UPDATES_TOTAL = counter("bot_updates_total", "Обработано обновлений Telegram", ("type",))
+UPDATE_ERRORS = counter("bot_update_errors_total", "Обновления, завершившиеся исключением", ("type",))
+UPDATE_DURATION = histogram("bot_update_duration_seconds", "Время обработки обновления целиком", ("type",))
+HANDLER_DURATION = histogram("bot_handler_duration_seconds", "Время работы обработчика", ("handler",))
+
+DB_QUERY_DURATION = histogram("db_query_duration_seconds", "Время выполнения запроса к БД", ("operation",))
+DB_QUERY_ERRORS = counter("db_query_errors_total", "Запросы к БД, завершившиеся ошибкой", ("operation",))
+DB_ACQUIRE_DURATION = histogram("db_pool_acquire_seconds", "Ожидание подключения из пула")
+
+SCHEDULER_JOB_DURATION = histogram(
+    "scheduler_job_duration_seconds", "Длительность задач планировщика", ("job",),
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+SCHEDULER_JOB_ERRORS = counter("scheduler_job_errors_total", "Задачи планировщика с ошибкой", ("job",))
+NOTIFICATIONS_TOTAL = counter("notifications_total", "Итоги отправки уведомлений", ("outcome",))
+EVENT_LOOP_LAG = histogram(
+    "event_loop_lag_seconds", "Задержка event loop",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+TELEGRAM_API_DURATION = histogram("telegram_api_duration_seconds", "Время запросов к Bot API", ("method",))
+TELEGRAM_API_ERRORS = counter("telegram_api_errors_total", "Запросы к Bot API с ошибкой", ("method",))
+
+# ========== РАЗБИВКА ВРЕМЕНИ ОБНОВЛЕНИЯ ==========
+
+class UpdateTiming:
+    """Куда ушло время одного обновления: БД, Telegram API, остальное"""
+
+    __slots__ = ("update_type", "handler", "router", "db_time", "db_queries",
+                 "db_wait", "api_time", "api_calls", "finished")
+
+    def __init__(self, update_type):
+        self.update_type = update_type
+        self.handler = None
+        self.router = None
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.db_wait = 0.0
+        self.api_time = 0.0
+        self.api_calls = 0
+        self.finished = False
+
+    def add_db(self, seconds):
+        # Фоновые задачи наследуют контекст обновления и могут пережить его
+        if not self.finished:
+            self.db_time += seconds
+            self.db_queries += 1
+
+    def add_db_wait(self, seconds):
+        if not self.finished:
+            self.db_wait += seconds
+
+    def add_api(self, seconds):
+        if not self.finished:
+            self.api_time += seconds
+            self.api_calls += 1
+
+# Разбивка текущего обновления (None вне обработки обновления)
+current_timing = ContextVar("current_timing", default=None)
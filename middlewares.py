@@ -0,0 +1,118 @@
+import time
+import logging
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.methods import GetUpdates
+from config import SLOW_UPDATE_THRESHOLD
+from health import readiness
+from metrics import (
+    UPDATES_TOTAL, UPDATE_ERRORS, UPDATE_DURATION, HANDLER_DURATION,
+    TELEGRAM_API_DURATION, TELEGRAM_API_ERRORS, UpdateTiming, current_timing
+)
+
+logger = logging.getLogger(__name__)
+
+def handler_name(handler):
+    """Имя обработчика для метрик и логов: модуль.функция"""
+    if handler is None:
+        return "unhandled"
+    callback = handler.callback
+    module = getattr(callback, "__module__", None) or "?"
+    name = getattr(callback, "__qualname__", None) or type(callback).__name__
+    return f"{module}.{name}"
+
+def router_name(router, handler):
+    """Имя роутера; для безымянного Router() - модуль, где объявлен обработчик"""
+    if router is not None and router.name != hex(id(router)):
+        return router.name
+    if handler is None:
+        return "?"
+    return getattr(handler.callback, "__module__", None) or "?"
+
+def format_slow_update(timing, elapsed):
+    """Строка лога для медленного обновления"""
+    other = max(elapsed - timing.db_time - timing.db_wait - timing.api_time, 0.0)
+    return (
+        f"🐢 Медленное обновление {timing.update_type}: {elapsed:.3f} с, "
+        f"обработчик {timing.handler or 'unhandled'} (роутер {timing.router or '?'}); "
+        f"БД {timing.db_time:.3f} с ({timing.db_queries} запр.), "
+        f"ожидание пула {timing.db_wait:.3f} с, "
+        f"Telegram API {timing.api_time:.3f} с ({timing.api_calls} выз.), "
+        f"прочее {other:.3f} с"
+    )
+
+class UpdateTimingMiddleware(BaseMiddleware):
+    """
+    Внешний middleware на update: время обновления целиком, метрики
+    по типам и лог обновлений дольше SLOW_UPDATE_THRESHOLD с разбивкой
+    на время БД и Telegram API.
+    """
+
+    def __init__(self, threshold=SLOW_UPDATE_THRESHOLD):
+        self.threshold = threshold
+
+    async def __call__(self, handler, event, data):
+        readiness.mark_update()
+        timing = UpdateTiming(event.event_type)
+        token = current_timing.set(timing)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            UPDATE_ERRORS.inc(timing.update_type)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            timing.finished = True
+            current_timing.reset(token)
+            UPDATES_TOTAL.inc(timing.update_type)
+            UPDATE_DURATION.observe(elapsed, timing.update_type)
+            if elapsed >= self.threshold:
+                logger.warning(format_slow_update(timing, elapsed))
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Внутренний middleware: время конкретного обработчика, прошедшего фильтры"""
+
+    async def __call__(self, handler, event, data):
+        matched = data.get("handler")
+        name = handler_name(matched)
+        timing = current_timing.get()
+        if timing is not None:
+            timing.handler = name
+            timing.router = router_name(data.get("event_router"), matched)
+        with HANDLER_DURATION.time(name):
+            return await handler(event, data)
+
+class ApiTimingMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: время каждого запроса к Bot API"""
+
+    async def __call__(self, make_request, bot, method):
+        method_name = type(method).__name__
+        started = time.perf_counter()
+        try:
+            result = await make_request(bot, method)
+        except Exception:
+            TELEGRAM_API_ERRORS.inc(method_name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            TELEGRAM_API_DURATION.observe(elapsed, method_name)
+            timing = current_timing.get()
+            if timing is not None:
+                timing.add_api(elapsed)
+        if isinstance(method, GetUpdates):
+            # Long polling жив - для /ready
+            readiness.mark_poll()
+        return result
+
+def setup_middlewares(dp, bot=None):
+    """Подключить middleware замеров к диспетчеру и сессии бота"""
+    dp.update.outer_middleware(UpdateTimingMiddleware())
+    # Внутренние middleware корневого роутера наследуются всеми вложенными
+    handler_metrics = HandlerMetricsMiddleware()
+    for event_name, observer in dp.observers.items():
+        if event_name != "update" and isinstance(observer, TelegramEventObserver):
+            observer.middleware(handler_metrics)
+    if bot is not None:
+        bot.session.middleware(ApiTimingMiddleware())
@@ -0,0 +1,140 @@
+import os
+import re
+import time
+import logging
+import asyncpg
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# ========== МИГРАЦИИ СХЕМЫ ==========
+# Файлы migrations/NNNN_описание.sql применяются по возрастанию номера,
+# каждый в своей транзакции. Номер последнего примененного хранится
+# в schema_version; на "теплом" старте выполняется один SELECT.
+#
+# Файл, первая строка которого "-- no-transaction", выполняется вне
+# транзакции (нужно для CREATE INDEX CONCURRENTLY на больших таблицах),
+# по одному оператору: несколько операторов в одном простом запросе
+# PostgreSQL все равно выполнит как неявную транзакцию. Упавший
+# CREATE INDEX CONCURRENTLY оставляет индекс INVALID, который повторный
+# IF NOT EXISTS молча пропустит, поэтому такой файл начинаем с
+# DROP INDEX CONCURRENTLY IF EXISTS того же индекса.
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Ключ advisory-блокировки: два экземпляра при деплое не мигрируют одновременно
+MIGRATION_LOCK_ID = 81_000_001
+
+_FILE_RE = re.compile(r"^(\d{4})_([\w-]+)\.sql$")
+# Токены, внутри которых ";" не разделяет операторы
+_SQL_TOKEN_RE = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|(\$\w*\$)|;", re.S)
+_NO_TRANSACTION = "-- no-transaction"
+
+_CREATE_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+
+@dataclass(frozen=True)
+class Migration:
+    """Один файл миграции"""
+    version: int
+    name: str
+    path: str
+
+    def read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+def discover(directory=MIGRATIONS_DIR):
+    """Файлы миграций по возрастанию версии"""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILE_RE.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"❌ Повторяющиеся номера миграций в {directory}")
+    return migrations
+
+def split_statements(sql):
+    """
+    Разбить SQL на операторы по ";" вне строк, комментариев
+    и $$-блоков. Комментарии в результат не попадают.
+    """
+    statements, current, pos = [], [], 0
+    while True:
+        match = _SQL_TOKEN_RE.search(sql, pos)
+        if match is None:
+            current.append(sql[pos:])
+            break
+        current.append(sql[pos:match.start()])
+        token = match.group(0)
+        pos = match.end()
+        if token == ";":
+            statements.append("".join(current))
+            current = []
+        elif match.group(1):
+            # $tag$ ... $tag$ - тело функции, ищем закрывающий тег
+            end = sql.find(token, pos)
+            end = len(sql) if end < 0 else end + len(token)
+            current.append(token + sql[pos:end])
+            pos = end
+        elif not token.startswith(("--", "/*")):
+            current.append(token)
+    statements.append("".join(current))
+    return [statement.strip() for statement in statements if statement.strip()]
+
+async def current_version(conn):
+    """Последняя примененная версия (0 - схема еще не под миграциями)"""
+    try:
+        return await conn.fetchval("SELECT coalesce(max(version), 0) FROM schema_version")
+    except asyncpg.UndefinedTableError:
+        return 0
+
+async def apply(conn, migration):
+    """Применить одну миграцию и записать ее версию"""
+    sql = migration.read()
+    started = time.perf_counter()
+    if sql.lstrip().startswith(_NO_TRANSACTION):
+        for statement in split_statements(sql):
+            await conn.execute(statement)
+        await conn.execute("INSERT INTO schema_version (version, name) VALUES ($1, $2)", migration.version, migration.name)
+    else:
+        async with conn.transaction():
+            await conn.execute(sql)
+            await conn.execute("INSERT INTO schema_version (version, name) VALUES ($1, $2)", migration.version, migration.name)
+    logger.info(f"✅ Миграция {migration.version:04d}_{migration.name} применена за {time.perf_counter() - started:.2f} с")
+
+async def migrate(conn, directory=MIGRATIONS_DIR):
+    """
+    Привести схему к последней версии.
+
+    Returns:
+        int: версия схемы после запуска
+    """
+    migrations = discover(directory)
+    latest = migrations[-1].version if migrations else 0
+    version = await current_version(conn)
+    if version >= latest:
+        logger.info(f"✅ Схема БД актуальна (версия {version})")
+        return version
+
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+    try:
+        await conn.execute(_CREATE_VERSION_TABLE)
+        # Пока ждали блокировку, миграции мог применить другой экземпляр
+        version = await current_version(conn)
+        for migration in migrations:
+            if migration.version > version:
+                await apply(conn, migration)
+                version = migration.version
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+    logger.info(f"✅ Схема БД обновлена до версии {version}")
+    return version
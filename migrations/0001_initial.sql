@@ -0,0 +1,88 @@
+-- Исходная схема: все, что раньше создавал init_db() при каждом запуске.
+-- Везде IF NOT EXISTS - на уже работающей базе миграция ничего не ломает
+-- и просто фиксирует версию 1.
+
+-- Пользователи
+CREATE TABLE IF NOT EXISTS users (
+    user_id BIGINT PRIMARY KEY,
+    username TEXT,
+    fio TEXT,
+    rank TEXT,
+    qual_rank TEXT,
+    vacation_start DATE,
+    vacation_end DATE,
+    vlk_date DATE,
+    umo_date DATE,
+    kbp_4_md_m DATE,
+    kbp_7_md_m DATE,
+    kbp_4_md_90a DATE,
+    kbp_7_md_90a DATE,
+    jumps_date TEXT,
+    registered BOOLEAN DEFAULT FALSE
+);
+
+-- Частичные индексы по отслеживаемым срокам для ежедневной проверки
+-- (по одному на каждую колонку из qualifications.QUALIFICATIONS;
+-- новый срок в реестре - новая миграция с индексом)
+CREATE INDEX IF NOT EXISTS idx_users_vacation_start ON users (vacation_start) WHERE registered;
+CREATE INDEX IF NOT EXISTS idx_users_vacation_end ON users (vacation_end) WHERE registered;
+CREATE INDEX IF NOT EXISTS idx_users_vlk_date ON users (vlk_date) WHERE registered;
+CREATE INDEX IF NOT EXISTS idx_users_umo_date ON users (umo_date) WHERE registered;
+CREATE INDEX IF NOT EXISTS idx_users_kbp_4_md_m ON users (kbp_4_md_m) WHERE registered;
+CREATE INDEX IF NOT EXISTS idx_users_kbp_7_md_m ON users (kbp_7_md_m) WHERE registered;
+CREATE INDEX IF NOT EXISTS idx_users_kbp_4_md_90a ON users (kbp_4_md_90a) WHERE registered;
+CREATE INDEX IF NOT EXISTS idx_users_kbp_7_md_90a ON users (kbp_7_md_90a) WHERE registered;
+CREATE INDEX IF NOT EXISTS idx_users_jumps_date ON users (jumps_date) WHERE registered;
+
+-- Постраничный список личного состава (keyset по ФИО)
+CREATE INDEX IF NOT EXISTS idx_users_roster
+    ON users ((coalesce(fio, '')), user_id) WHERE registered;
+
+-- "Полезная информация" (аэродромы, телефоны)
+CREATE TABLE IF NOT EXISTS info_base (
+    id SERIAL PRIMARY KEY,
+    keyword TEXT,
+    content TEXT
+);
+
+-- Ключевое слово уникально: повторная загрузка справочника
+-- обновляет записи, а не дублирует их. Старые дубли убираем.
+DELETE FROM info_base a
+    USING info_base b
+    WHERE a.keyword = b.keyword AND a.id > b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS info_base_keyword_key ON info_base (keyword);
+
+-- Триграммный индекс для поиска аэродромов: регистр и ё/е
+-- нормализуются тем же выражением, что и в database.search_info()
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_info_base_keyword_trgm
+    ON info_base USING GIN ((replace(lower(keyword), 'ё', 'е')) gin_trgm_ops);
+
+-- Администраторы (главный админ добавляется в database.load_admins())
+CREATE TABLE IF NOT EXISTS admins (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT UNIQUE,
+    added_by BIGINT,
+    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Состояния FSM (см. fsm_storage.PostgresStorage)
+CREATE TABLE IF NOT EXISTS fsm_state (
+    bot_id BIGINT NOT NULL,
+    chat_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    thread_id BIGINT NOT NULL DEFAULT 0,
+    destiny TEXT NOT NULL,
+    state TEXT,
+    data JSONB NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (bot_id, chat_id, user_id, thread_id, destiny)
+);
+CREATE INDEX IF NOT EXISTS idx_fsm_state_updated_at ON fsm_state (updated_at);
+
+-- Последние сообщения бота по чатам (см. message_store.LastMessageStore)
+CREATE TABLE IF NOT EXISTS last_bot_messages (
+    chat_id BIGINT PRIMARY KEY,
+    message_id BIGINT NOT NULL,
+    sent_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,134 @@
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from aiogram.exceptions import (
+    TelegramAPIError, TelegramForbiddenError, TelegramNetworkError,
+    TelegramRetryAfter, TelegramServerError
+)
+from config import (
+    TELEGRAM_RATE_LIMIT, TELEGRAM_BURST, NOTIFY_CONCURRENCY,
+    NOTIFY_MAX_RETRIES, NOTIFY_RETRY_BASE_DELAY
+)
+from metrics import NOTIFICATIONS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+# Результат отправки одного сообщения
+SENT, FAILED, BLOCKED = "sent", "failed", "blocked"
+
+@dataclass
+class DispatchReport:
+    """Итог одной рассылки"""
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+
+class TokenBucket:
+    """
+    Общий ограничитель частоты запросов к Telegram.
+    rate - токенов в секунду, capacity - допустимый всплеск.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Остановить выдачу токенов (Telegram вернул 429)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        """Дождаться токена"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class NotificationDispatcher:
+    """
+    Рассылка сообщений с ограничением частоты.
+    
+    - не больше NOTIFY_CONCURRENCY чатов обрабатываются одновременно;
+    - все запросы проходят через общий TokenBucket (1 / TELEGRAM_RATE_LIMIT в секунду);
+    - сообщения в один чат уходят строго по порядку;
+    - на 429 ждем retry_after, сетевые ошибки и 5xx повторяем с backoff.
+    """
+
+    def __init__(self, bot, rate=None, burst=TELEGRAM_BURST,
+                 concurrency=NOTIFY_CONCURRENCY, max_retries=NOTIFY_MAX_RETRIES):
+        self.bot = bot
+        self.bucket = TokenBucket(rate or 1 / TELEGRAM_RATE_LIMIT, burst)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+
+    async def send_all(self, messages):
+        """
+        Разослать сообщения.
+        
+        Args:
+            messages: iterable пар (chat_id, text)
+        
+        Returns:
+            DispatchReport: счетчики sent / failed / retried
+        """
+        by_chat = {}
+        for chat_id, text in messages:
+            by_chat.setdefault(chat_id, []).append(text)
+        
+        report = DispatchReport()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def send_chat(chat_id, texts):
+            async with semaphore:
+                for i, text in enumerate(texts):
+                    if await self._send(chat_id, text, report) == BLOCKED:
+                        # Бот заблокирован - остальные сообщения в этот чат не дойдут
+                        report.failed += len(texts) - i - 1
+                        return
+        
+        await asyncio.gather(*(send_chat(chat_id, texts) for chat_id, texts in by_chat.items()))
+        NOTIFICATIONS_TOTAL.inc(SENT, amount=report.sent)
+        NOTIFICATIONS_TOTAL.inc(FAILED, amount=report.failed)
+        NOTIFICATIONS_TOTAL.inc("retried", amount=report.retried)
+        return report
+
+    async def _send(self, chat_id, text, report):
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id, text)
+                report.sent += 1
+                return SENT
+            except TelegramRetryAfter as e:
+                logger.warning(f"⏳ Flood control, ждем {e.retry_after} с (чат {chat_id})")
+                self.bucket.pause(e.retry_after)
+            except (TelegramNetworkError, TelegramServerError) as e:
+                delay = NOTIFY_RETRY_BASE_DELAY * (2 ** attempt)
+                logger.warning(f"⚠️ Ошибка отправки в {chat_id}: {e}, повтор через {delay:.1f} с")
+                await asyncio.sleep(delay)
+            except TelegramForbiddenError as e:
+                logger.info(f"🚫 Чат {chat_id} недоступен: {e}")
+                report.failed += 1
+                return BLOCKED
+            except TelegramAPIError as e:
+                logger.error(f"❌ Не удалось отправить сообщение в {chat_id}: {e}")
+                report.failed += 1
+                return FAILED
+            if attempt < self.max_retries:
+                report.retried += 1
+        logger.error(f"❌ Сообщение в {chat_id} не отправлено после {self.max_retries} повторов")
+        report.failed += 1
+        return FAILED
@@ -0,0 +1,197 @@
+# Реестр отслеживаемых сроков и расчет их статусов.
+# Профиль, список, статистика и планировщик берут список полей отсюда
+# и считают статусы одним проходом с одной датой "сегодня".
+from dataclasses import dataclass
+from datetime import datetime, date
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+from config import SCHEDULER_TIMEZONE
+
+# Уровни статуса срока
+EXPIRED = 'expired'   # просрочено
+WARNING = 'warning'   # скоро истекает
+OK = 'ok'             # действует
+NO_DATA = 'no_data'   # дата не указана
+EXEMPT = 'exempt'     # освобожден (для прыжков)
+
+LEVEL_EMOJI = {
+    EXPIRED: "🔴",
+    WARNING: "🟡",
+    OK: "🟢",
+    NO_DATA: "⚪",
+    EXEMPT: "⚪",
+}
+
+# Значения, означающие освобождение от требования
+EXEMPT_VALUES = ('освобожден', 'освобождён', 'осв')
+
+@dataclass(frozen=True)
+class Qualification:
+    """Отслеживаемый срок"""
+    column: str              # колонка в таблице users
+    label: str               # название в профиле
+    short: str               # краткое название (список, уведомления)
+    bans_flight: bool = False  # просрочка запрещает полеты
+    warn_days: int = 30      # за сколько дней срок становится "желтым"
+    in_profile: bool = True  # показывать в профиле
+    ban_text: str = ""       # текст запрета, например "ВЛК просрочена"
+    tracks_expiry: bool = True  # срок действия; False - просто дата (отпуск),
+                                # в статистике и фильтрах не "просрочивается"
+
+QUALIFICATIONS = (
+    Qualification('vacation_start', 'Отпуск (начало)', 'Отпуск (начало)', in_profile=False, tracks_expiry=False),
+    Qualification('vacation_end', 'Отпуск (конец)', 'Отпуск (конец)', tracks_expiry=False),
+    Qualification('vlk_date', 'ВЛК', 'ВЛК', bans_flight=True, ban_text='ВЛК просрочена'),
+    Qualification('umo_date', 'УМО', 'УМО'),
+    Qualification('kbp_4_md_m', 'КБП-4 (Ил-76 МД-М)', 'КБП-4 МД-М',
+                  bans_flight=True, ban_text='КБП-4 (МД-М) просрочен'),
+    Qualification('kbp_7_md_m', 'КБП-7 (Ил-76 МД-М)', 'КБП-7 МД-М'),
+    Qualification('kbp_4_md_90a', 'КБП-4 (Ил-76 МД-90А)', 'КБП-4 МД-90А',
+                  bans_flight=True, ban_text='КБП-4 (МД-90А) просрочен'),
+    Qualification('kbp_7_md_90a', 'КБП-7 (Ил-76 МД-90А)', 'КБП-7 МД-90А'),
+    Qualification('jumps_date', 'Прыжки с ПДС', 'ПДС',
+                  bans_flight=True, ban_text='Прыжки с ПДС просрочены'),
+)
+
+QUALIFICATIONS_BY_COLUMN = {q.column: q for q in QUALIFICATIONS}
+
+# Сроки действия: по ним считаются статистика, "требуют внимания" и фильтры списка
+EXPIRING_QUALIFICATIONS = tuple(q for q in QUALIFICATIONS if q.tracks_expiry)
+
+@dataclass(frozen=True)
+class FieldStatus:
+    """Статус одного срока у одного пользователя"""
+    qualification: Qualification
+    value: Optional[date]
+    days_left: Optional[int]
+    level: str
+
+    @property
+    def emoji(self):
+        return LEVEL_EMOJI[self.level]
+
+    @property
+    def is_ban(self):
+        return self.level == EXPIRED and self.qualification.bans_flight
+
+@dataclass(frozen=True)
+class UserStatus:
+    """Статусы всех сроков пользователя на одну дату"""
+    user: dict
+    today: date
+    fields: Dict[str, FieldStatus]
+
+    @property
+    def bans(self) -> List[FieldStatus]:
+        return [status for status in self.fields.values() if status.is_ban]
+
+    @property
+    def is_banned(self):
+        return any(status.is_ban for status in self.fields.values())
+
+    @property
+    def has_warnings(self):
+        return any(
+            status.level == WARNING for status in self.fields.values()
+            if status.qualification.tracks_expiry
+        )
+
+    @property
+    def has_expired(self):
+        return any(
+            status.level == EXPIRED for status in self.fields.values()
+            if status.qualification.tracks_expiry
+        )
+
+def local_today():
+    """Текущая дата в часовом поясе полка (SCHEDULER_TIMEZONE)"""
+    return datetime.now(ZoneInfo(SCHEDULER_TIMEZONE)).date()
+
+def to_date(value):
+    """date, строка ДД.ММ.ГГГГ или None -> date или None"""
+    if isinstance(value, date):
+        return value
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip(), "%d.%m.%Y").date()
+    except ValueError:
+        return None
+
+def is_exempt(value):
+    return isinstance(value, str) and value.strip().lower() in EXEMPT_VALUES
+
+# Колонки users типа DATE (jumps_date хранится текстом ДД.ММ.ГГГГ)
+DATE_FIELDS = (
+    'vacation_start', 'vacation_end', 'vlk_date', 'umo_date',
+    'kbp_4_md_m', 'kbp_7_md_m', 'kbp_4_md_90a', 'kbp_7_md_90a'
+)
+
+def convert_field_value(field, value):
+    """
+    Привести введенное значение к типу колонки.
+    Строки дат -> date, 'освобожден' для jumps_date сохраняется как есть.
+    Пустое значение -> None.
+    
+    Raises:
+        ValueError: дата не в формате ДД.ММ.ГГГГ (в БД не пишем NULL молча)
+    """
+    if field in DATE_FIELDS:
+        if not value:
+            return None
+        if isinstance(value, date):
+            return value
+        try:
+            return datetime.strptime(value.strip(), "%d.%m.%Y").date()
+        except (ValueError, TypeError, AttributeError):
+            raise ValueError(f"Некорректная дата для {field}: {value!r}")
+    
+    # jumps_date хранится в TEXT: либо 'освобожден', либо ДД.ММ.ГГГГ
+    if field == 'jumps_date':
+        if isinstance(value, date):
+            return value.strftime("%d.%m.%Y")
+        if not value or not isinstance(value, str):
+            return None
+        value = value.strip()
+        if value.lower() in EXEMPT_VALUES:
+            return 'освобожден'
+        try:
+            return datetime.strptime(value, "%d.%m.%Y").strftime("%d.%m.%Y")
+        except ValueError:
+            raise ValueError(f"Некорректная дата для {field}: {value!r}")
+    
+    return value
+
+def level_for_days(days_left, warn_days=30):
+    """Уровень статуса по количеству оставшихся дней"""
+    if days_left is None:
+        return NO_DATA
+    if days_left < 0:
+        return EXPIRED
+    if days_left <= warn_days:
+        return WARNING
+    return OK
+
+def evaluate_field(qualification, raw_value, today):
+    """Статус одного срока"""
+    if is_exempt(raw_value):
+        return FieldStatus(qualification, None, None, EXEMPT)
+    value = to_date(raw_value)
+    if value is None:
+        return FieldStatus(qualification, None, None, NO_DATA)
+    days_left = (value - today).days
+    return FieldStatus(qualification, value, days_left, level_for_days(days_left, qualification.warn_days))
+
+def evaluate_user(user, today=None) -> UserStatus:
+    """Посчитать статусы всех сроков пользователя (по умолчанию - на сегодня по МСК)"""
+    today = today or local_today()
+    fields = {
+        q.column: evaluate_field(q, user.get(q.column), today)
+        for q in QUALIFICATIONS
+    }
+    return UserStatus(user, today, fields)
+
+def evaluate_users(users: Iterable[dict], today=None) -> List[UserStatus]:
+    """Посчитать статусы для списка пользователей с одной датой "сегодня" """
+    today = today or local_today()
+    return [evaluate_user(user, today) for user in users]
@@ -0,0 +1,40 @@
+import time
+import logging
+from config import ADMIN_ID, OWNERS
+
+logger = logging.getLogger(__name__)
+
+class AdminRegistry:
+    """
+    Множество ID админов в памяти процесса.
+    
+    Заполняется из таблицы admins при старте и периодически обновляется.
+    Каждое изменение заменяет frozenset целиком, поэтому проверка
+    is_admin() - это O(1) без запросов к БД и без блокировок.
+    Владельцы (ADMIN_ID, OWNERS) всегда считаются админами.
+    """
+
+    def __init__(self, owners):
+        self._owners = frozenset(owners)
+        self._ids = self._owners
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def is_admin(self, user_id):
+        return user_id in self._ids
+
+    def replace(self, user_ids):
+        """Полностью заменить список (загрузка из БД)"""
+        self._ids = frozenset(user_ids) | self._owners
+        self.loaded_at = time.time()
+
+    def add(self, user_id):
+        self._ids = self._ids | {user_id}
+
+    def discard(self, user_id):
+        if user_id not in self._owners:
+            self._ids = self._ids - {user_id}
+
+admin_registry = AdminRegistry([ADMIN_ID, *OWNERS])
@@ -1,57 +1,109 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from database import get_all_users
-from utils import parse_date, check_status
-from config import ADMIN_ID
-import asyncio
+from apscheduler.triggers.interval import IntervalTrigger
+from database import get_due_deadlines, get_all_admins, load_admins
+from utils import split_message, local_today
+from qualifications import QUALIFICATIONS
+from config import ADMIN_ID, SCHEDULER_TIMEZONE, ADMIN_REFRESH_INTERVAL
+from notifications import NotificationDispatcher
+from compliance import compliance_counters
+from metrics import SCHEDULER_JOB_DURATION, SCHEDULER_JOB_ERRORS
+import html
+import inspect
+import logging
 
-async def send_notification(bot, user_id, text):
-    try:
-        await bot.send_message(user_id, text)
-    except Exception as e:
-        print(f"Не удалось отправить сообщение пользователю {user_id}: {e}")
+logger = logging.getLogger(__name__)
 
-async def check_deadlines(bot):
-    users = await get_all_users()
-    today_str = "сегодня" # Логика упрощена для примера
+# За сколько дней до окончания срока присылать напоминание
+CHECK_DAYS = (30, 14, 7, 0)
+
+# Отслеживаемые сроки: колонка -> название в уведомлении
+DEADLINE_FIELDS = {q.column: q.short for q in QUALIFICATIONS}
+
+# Заголовки групп сводки по количеству оставшихся дней
+SEVERITY_TITLES = {
+    0: "🔴 <b>Истекают сегодня</b>",
+    7: "🟠 <b>Через 7 дней</b>",
+    14: "🟡 <b>Через 14 дней</b>",
+    30: "🟢 <b>Через 30 дней</b>",
+}
+
+def build_admin_digest(due, today):
+    """
+    Сводка для админов: группы по сроку (сегодня / 7 / 14 / 30 дней),
+    внутри - по полю. Возвращает список частей не длиннее 4096 символов.
+    """
+    groups = {}
+    for item in due:
+        days = max(item['days_left'], 0)
+        groups.setdefault(days, {}).setdefault(item['field'], []).append(item['fio'] or '—')
     
-    # Дни для проверки: 30, 14, 7, 0
-    check_days = [30, 14, 7, 0]
+    lines = [f"🚨 <b>Сводка по срокам на {today.strftime('%d.%m.%Y')}</b>"]
+    for days in sorted(groups):
+        lines.append("")
+        lines.append(SEVERITY_TITLES.get(days, f"<b>Через {days} дн.</b>"))
+        for field in DEADLINE_FIELDS:
+            names = groups[days].get(field)
+            if not names:
+                continue
+            lines.append(f"{DEADLINE_FIELDS[field]} ({len(names)}):")
+            lines.extend(f"  • {html.escape(name)}" for name in sorted(names))
+    return split_message(lines)
+
+async def check_deadlines(bot):
+    # Отбор делает БД: приходят только сроки, по которым сегодня
+    # нужно уведомление, а не весь список личного состава
+    today = local_today()
+    due = await get_due_deadlines(today, CHECK_DAYS)
     
-    for user in users:
-        user_id = user['user_id']
-        fio = user['fio']
+    messages = []
+    for item in due:
+        name = DEADLINE_FIELDS.get(item['field'], item['field'])
+        fio = item['fio']
+        days = max(item['days_left'], 0)
         
-        # Словарь полей для проверки
-        fields_to_check = {
-            'vlk_date': ('ВЛК', 6),
-            'kbp_4_md_m': ('КБП-4 МД-М', 6),
-            'kbp_7_md_m': ('КБП-7 МД-М', 12),
-            'jumps_date': ('Прыжки', 12),
-            # ... добавить остальные
-        }
-
-        for field, (name, limit_months) in fields_to_check.items():
-            date_val = parse_date(user.get(field))
-            if not date_val: continue
-            
-            days_left = (date_val - parse_date("01.01.2000")).days # Заглушка, нужна реальная логика diff
-            
-            # Реальная логика diff (упрощенная)
-            from datetime import datetime
-            delta = date_val - datetime.now().date()
-            days = delta.days
-            
-            if days in check_days:
-                msg_user = f"⚠️ {fio}, через {days if days > 0 else 0} дней истекает срок: {name}"
-                msg_admin = f"🚨 Админ: У {fio} через {days if days > 0 else 0} дней выходит {name}"
-                
-                await send_notification(bot, user_id, msg_user)
-                await send_notification(bot, ADMIN_ID, msg_admin)
+        msg_user = f"⚠️ {fio}, через {days} дней истекает срок: {name}"
+        messages.append((item['user_id'], msg_user))
+    
+    # Админам - одна сводка на всех вместо сообщения на каждый срок
+    if due:
+        digest = build_admin_digest(due, today)
+        admin_ids = {admin['user_id'] for admin in await get_all_admins()}
+        admin_ids.add(ADMIN_ID)
+        for admin_id in sorted(admin_ids):
+            messages.extend((admin_id, part) for part in digest)
+    
+    report = await NotificationDispatcher(bot).send_all(messages)
+    logger.info(
+        f"📨 Уведомления: отправлено {report.sent}, ошибок {report.failed}, "
+        f"повторов {report.retried}"
+    )
+    return report
+
+def rollover_counters():
+    compliance_counters.rollover(local_today())
+
+def timed_job(name, func):
+    """Обернуть задачу планировщика замером длительности и счетчиком ошибок"""
+    async def job(*args):
+        with SCHEDULER_JOB_DURATION.time(name):
+            try:
+                result = func(*args)
+                if inspect.isawaitable(result):
+                    result = await result
+                return result
+            except Exception:
+                SCHEDULER_JOB_ERRORS.inc(name)
+                raise
+    return job
 
 def start_scheduler(bot):
-    scheduler = AsyncIOScheduler()
+    scheduler = AsyncIOScheduler(timezone=SCHEDULER_TIMEZONE)
     # Запуск проверки каждый день в 9:00
-    scheduler.add_job(check_deadlines, CronTrigger(hour=9, minute=0), args=[bot])
+    scheduler.add_job(timed_job("check_deadlines", check_deadlines), CronTrigger(hour=9, minute=0), args=[bot])
+    # Смена суток для счетчиков статистики
+    scheduler.add_job(timed_job("rollover_counters", rollover_counters), CronTrigger(hour=0, minute=0))
+    # Подхватываем админов, добавленных в БД другим процессом или вручную
+    scheduler.add_job(timed_job("load_admins", load_admins), IntervalTrigger(seconds=ADMIN_REFRESH_INTERVAL))
     scheduler.start()
     return scheduler
\ No newline at end of file
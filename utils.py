@@ -1,38 +1,23 @@
-from datetime import datetime, date
+from qualifications import (
+    QUALIFICATIONS, EXEMPT, NO_DATA, LEVEL_EMOJI,
+    evaluate_user, level_for_days, to_date, local_today
+)
 
 def parse_date(date_str):
     """Преобразует строку даты в объект date"""
-    if not date_str or date_str.lower() in ['нет', 'освобожден', 'осв', 'n/a', '-']:
-        return None
-    try:
-        return datetime.strptime(date_str.strip(), "%d.%m.%Y").date()
-    except (ValueError, TypeError):
-        return None
+    return to_date(date_str)
 
 def check_status(date_value):
     """
     Проверяет статус даты (для планировщика).
     Returns: 'expired' (просрочено), 'warning' (скоро), 'ok' (действует)
     """
+    date_value = to_date(date_value)
     if not date_value:
         return 'no_data'
-    
-    if isinstance(date_value, str):
-        date_value = parse_date(date_value)
-        if not date_value:
-            return 'no_data'
-    
-    today = date.today()
-    days = (date_value - today).days
-    
-    if days < 0:
-        return 'expired'
-    elif days <= 30:
-        return 'warning'
-    else:
-        return 'ok'
+    return level_for_days((date_value - local_today()).days)
 
-def get_status_color(days_remaining):
+def get_status_color(days_remaining, warn_days=30):
     """
     Определяет статус и цвет по количеству дней.
     Returns: (emoji, status_text)
@@ -41,18 +26,21 @@ def get_status_color(days_remaining):
         return "⚪", "Нет данных"
     elif days_remaining < 0:
         return "🔴", f"Просрочено на {abs(days_remaining)} дн."
-    elif days_remaining <= 30:
+    elif days_remaining <= warn_days:
         return "🟡", f"Осталось {days_remaining} дн."
     else:
         return "🟢", f"Действует (осталось {days_remaining} дн.)"
 
-def generate_profile_text(user):
+def generate_profile_text(user, status=None):
     """
     Генерирует текст профиля с цветовой индикацией сроков.
+    status - готовый результат evaluate_user (если уже посчитан).
     """
     if not user:
         return "❌ Пользователь не найден"
     
+    status = status or evaluate_user(user)
+    
     fio = user.get('fio', 'Нет данных') or 'Нет данных'
     rank = user.get('rank', 'Нет') or 'Нет'
     qual_rank = user.get('qual_rank', 'Нет') or 'Нет'
@@ -61,156 +49,68 @@ def generate_profile_text(user):
     text += f"🎖 Звание: {rank}\n"
     text += f"🏅 Квалификация: {qual_rank}\n"
     
-    today = date.today()
-    
-    # Отпуск (конец)
-    vacation_end = parse_date(user.get('vacation_end'))
-    if vacation_end:
-        days = (vacation_end - today).days
-        emoji, status = get_status_color(days)
-        text += f"\n{emoji} Отпуск (конец):: {vacation_end.strftime('%d.%m.%Y')} ({status})"
-    else:
-        text += f"\n⚪ Отпуск (конец):: Нет данных"
-    
-    # ВЛК
-    vlk_date = parse_date(user.get('vlk_date'))
-    if vlk_date:
-        days = (vlk_date - today).days
-        emoji, status = get_status_color(days)
-        text += f"\n{emoji} ВЛК: {vlk_date.strftime('%d.%m.%Y')} ({status})"
-    else:
-        text += f"\n⚪ ВЛК: Нет данных"
-    
-    # УМО
-    umo_date = parse_date(user.get('umo_date'))
-    if umo_date:
-        days = (umo_date - today).days
-        emoji, status = get_status_color(days)
-        text += f"\n{emoji} УМО: {umo_date.strftime('%d.%m.%Y')} ({status})"
-    else:
-        text += f"\n⚪ УМО: Нет данных"
-    
-    # КБП-4 (Ил-76 МД-М)
-    kbp_4_md_m = parse_date(user.get('kbp_4_md_m'))
-    if kbp_4_md_m:
-        days = (kbp_4_md_m - today).days
-        emoji, status = get_status_color(days)
-        text += f"\n{emoji} КБП-4 (Ил-76 МД-М):: {kbp_4_md_m.strftime('%d.%m.%Y')} ({status})"
-    else:
-        text += f"\n⚪ КБП-4 (Ил-76 МД-М):: Нет данных"
-    
-    # КБП-7 (Ил-76 МД-М)
-    kbp_7_md_m = parse_date(user.get('kbp_7_md_m'))
-    if kbp_7_md_m:
-        days = (kbp_7_md_m - today).days
-        emoji, status = get_status_color(days)
-        text += f"\n{emoji} КБП-7 (Ил-76 МД-М):: {kbp_7_md_m.strftime('%d.%m.%Y')} ({status})"
-    else:
-        text += f"\n⚪ КБП-7 (Ил-76 МД-М):: Нет данных"
-    
-    # КБП-4 (Ил-76 МД-90А)
-    kbp_4_md_90a = parse_date(user.get('kbp_4_md_90a'))
-    if kbp_4_md_90a:
-        days = (kbp_4_md_90a - today).days
-        emoji, status = get_status_color(days)
-        text += f"\n{emoji} КБП-4 (Ил-76 МД-90А):: {kbp_4_md_90a.strftime('%d.%m.%Y')} ({status})"
-    else:
-        text += f"\n⚪ КБП-4 (Ил-76 МД-90А):: Нет данных"
-    
-    # КБП-7 (Ил-76 МД-90А)
-    kbp_7_md_90a = parse_date(user.get('kbp_7_md_90a'))
-    if kbp_7_md_90a:
-        days = (kbp_7_md_90a - today).days
-        emoji, status = get_status_color(days)
-        text += f"\n{emoji} КБП-7 (Ил-76 МД-90А):: {kbp_7_md_90a.strftime('%d.%m.%Y')} ({status})"
-    else:
-        text += f"\n⚪ КБП-7 (Ил-76 МД-90А):: Нет данных"
-    
-    # Прыжки с ПДС
-    jumps_date_str = user.get('jumps_date')
-    if jumps_date_str and jumps_date_str.lower() not in ['освобожден', 'осв', 'нет']:
-        jumps_date = parse_date(jumps_date_str)
-        if jumps_date:
-            days = (jumps_date - today).days
-            emoji, status = get_status_color(days)
-            text += f"\n{emoji} Прыжки с ПДС:: {jumps_date.strftime('%d.%m.%Y')} ({status})"
+    for q in QUALIFICATIONS:
+        if not q.in_profile:
+            continue
+        field = status.fields[q.column]
+        if field.level == EXEMPT:
+            text += f"\n⚪ {q.label}: Освобожден"
+        elif field.level == NO_DATA:
+            text += f"\n⚪ {q.label}: Нет данных"
         else:
-            text += f"\n⚪ Прыжки с ПДС:: Нет данных"
-    elif jumps_date_str and jumps_date_str.lower() in ['освобожден', 'осв']:
-        text += f"\n⚪ Прыжки с ПДС:: Освобожден"
-    else:
-        text += f"\n⚪ Прыжки с ПДС:: Нет данных"
+            emoji, status_text = get_status_color(field.days_left, q.warn_days)
+            text += f"\n{emoji} {q.label}: {field.value.strftime('%d.%m.%Y')} ({status_text})"
     
     return text
 
-def check_flight_ban(user):
+def check_flight_ban(user, status=None):
     """
     Проверяет запреты на полеты.
     """
-    bans = []
-    today = date.today()
-    
-    vlk_date = parse_date(user.get('vlk_date'))
-    if vlk_date and vlk_date < today:
-        days = (today - vlk_date).days
-        bans.append(f"🔴 ВЛК просрочена на {days} дн.")
-    
-    kbp_4_md_m = parse_date(user.get('kbp_4_md_m'))
-    if kbp_4_md_m and kbp_4_md_m < today:
-        days = (today - kbp_4_md_m).days
-        bans.append(f"🔴 КБП-4 (МД-М) просрочен на {days} дн.")
-    
-    kbp_4_md_90a = parse_date(user.get('kbp_4_md_90a'))
-    if kbp_4_md_90a and kbp_4_md_90a < today:
-        days = (today - kbp_4_md_90a).days
-        bans.append(f"🔴 КБП-4 (МД-90А) просрочен на {days} дн.")
-    
-    jumps_date_str = user.get('jumps_date')
-    if jumps_date_str and jumps_date_str.lower() not in ['освобожден', 'осв', 'нет']:
-        jumps_date = parse_date(jumps_date_str)
-        if jumps_date and jumps_date < today:
-            days = (today - jumps_date).days
-            bans.append(f"🔴 Прыжки с ПДС просрочены на {days} дн.")
-    
-    return bans
+    status = status or evaluate_user(user)
+    return [
+        f"🔴 {field.qualification.ban_text} на {-field.days_left} дн."
+        for field in status.bans
+    ]
+
+def format_status_summary(status):
+    """Краткая строка статусов по срокам, влияющим на допуск к полетам"""
+    parts = [
+        f"{LEVEL_EMOJI[field.level]} {field.qualification.short}"
+        for field in status.fields.values()
+        if field.qualification.bans_flight and field.level not in (NO_DATA, EXEMPT)
+    ]
+    return " | ".join(parts) if parts else "⚪ Нет данных"
 
 def get_user_status_with_colors(user):
     """
     Возвращает краткий статус пользователя с цветами.
     """
-    today = date.today()
-    status_parts = []
-    
-    vlk_date = parse_date(user.get('vlk_date'))
-    if vlk_date:
-        days = (vlk_date - today).days
-        if days < 0:
-            status_parts.append("🔴 ВЛК")
-        elif days <= 30:
-            status_parts.append("🟡 ВЛК")
-        else:
-            status_parts.append("🟢 ВЛК")
-    
-    kbp_4_md_m = parse_date(user.get('kbp_4_md_m'))
-    if kbp_4_md_m:
-        days = (kbp_4_md_m - today).days
-        if days < 0:
-            status_parts.append("🔴 КБП-4")
-        elif days <= 30:
-            status_parts.append("🟡 КБП-4")
+    return format_status_summary(evaluate_user(user))
+
+# Максимальная длина одного сообщения Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+def split_message(lines, limit=TELEGRAM_MESSAGE_LIMIT):
+    """
+    Собрать строки в как можно меньше сообщений не длиннее limit.
+    Строки не разрываются, кроме тех, что сами длиннее limit.
+    """
+    chunks = []
+    current = ""
+    for line in lines:
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
         else:
-            status_parts.append("🟢 КБП-4")
-    
-    jumps_date_str = user.get('jumps_date')
-    if jumps_date_str and jumps_date_str.lower() not in ['освобожден', 'осв', 'нет']:
-        jumps_date = parse_date(jumps_date_str)
-        if jumps_date:
-            days = (jumps_date - today).days
-            if days < 0:
-                status_parts.append("🔴 ПДС")
-            elif days <= 30:
-                status_parts.append("🟡 ПДС")
-            else:
-                status_parts.append("🟢 ПДС")
-    
-    return " | ".join(status_parts) if status_parts else "⚪ Нет данных"
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks